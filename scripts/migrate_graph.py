@@ -0,0 +1,77 @@
+# scripts/migrate_graph.py
+
+"""
+One-off migration for graphs ingested before the governance precomputes
+Fills in the properties ingest now stores (and the SHACL validator filters
+on) and creates the validation indexes. The validator only reads the graph,
+so run this once after upgrading instead of re-ingesting:
+
+    python scripts/migrate_graph.py
+"""
+
+import os
+import sys
+
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.common.derived_properties import PII_NAME_PATTERNS, ROW_COUNT_DELTA_RATIO
+from src.common.validation_indexes import VALIDATION_INDEXES, ensure_validation_indexes
+
+load_dotenv()
+
+
+def backfill_derived_properties(driver):
+    """
+    - OlistData.qualified_name, 'schema.name' (node_id of Snowflake shapes)
+    - FederatedColumn.pii_hint (PIIDetectionShape)
+    - SIMILAR_TO.row_count_delta_ratio, -1 when not computable
+      (CrossPlatformConsistencyShape); also refreshed where it no longer
+      matches the endpoints' current row counts
+    """
+    with driver.session() as session:
+        updated = session.run("""
+            MATCH (t:OlistData)
+            WHERE t.qualified_name IS NULL
+            SET t.qualified_name = t.schema + '.' + t.name
+        """).consume().counters.properties_set
+        print(f"  ✓ OlistData.qualified_name: {updated} set")
+        
+        updated = session.run("""
+            MATCH (c:FederatedColumn)
+            WHERE c.pii_hint IS NULL AND c.name IS NOT NULL
+            SET c.pii_hint = any(pattern IN $patterns WHERE toLower(c.name) CONTAINS pattern)
+        """, patterns=list(PII_NAME_PATTERNS)).consume().counters.properties_set
+        print(f"  ✓ FederatedColumn.pii_hint: {updated} set")
+        
+        updated = session.run("""
+            MATCH (db:FederatedTable)-[r:SIMILAR_TO]->(sf:OlistData)
+            WITH r, """ + ROW_COUNT_DELTA_RATIO + """ AS ratio
+            WHERE r.row_count_delta_ratio IS NULL OR r.row_count_delta_ratio <> ratio
+            SET r.row_count_delta_ratio = ratio
+        """).consume().counters.properties_set
+        print(f"  ✓ SIMILAR_TO.row_count_delta_ratio: {updated} set")
+
+
+def main():
+    driver = GraphDatabase.driver(
+        "bolt://localhost:7687",
+        auth=("neo4j", os.getenv('NEO4J_PASSWORD'))
+    )
+    try:
+        print("🔧 Backfilling derived properties...")
+        backfill_derived_properties(driver)
+        
+        print("🔧 Creating validation indexes...")
+        ensure_validation_indexes(driver, {label for label, _, _ in VALIDATION_INDEXES})
+        print("✅ Migration complete")
+    finally:
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import snowflake.connector
 from pathlib import Path
+import gc
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 import time
 import os
 from dotenv import load_dotenv
@@ -24,6 +27,10 @@ class OlistSnowflakeUploader:
     Handles case sensitivity, large datasets, and creates test duplicates.
     """
     
+    # Files at or above this size load via PUT + COPY INTO; smaller ones are
+    # cheaper to push through batch inserts than to stage
+    COPY_THRESHOLD_BYTES = 5 * 1024 * 1024
+    
     def __init__(self, config: Dict[str, str], data_folder: str):
         """
         Initialize uploader with Snowflake credentials and data folder path.
@@ -120,7 +127,11 @@ class OlistSnowflakeUploader:
         }
     
     def connect(self):
-        """Establish Snowflake connection with retry logic."""
+        """Establish Snowflake connection with retry logic (reuses an open one)."""
+        if self.conn is not None and not self.conn.is_closed():
+            logger.info("Reusing open Snowflake connection")
+            return True
+        
         max_retries = 3
         for attempt in range(max_retries):
             try:
@@ -135,6 +146,9 @@ class OlistSnowflakeUploader:
                     'database': self.config['database'],
                     'role': self.config.get('role', 'ACCOUNTADMIN'),
                     'insecure_mode': False,  # Keep SSL verification on by default
+                    # Server-side binding: executemany sends rows as one array
+                    # bind (staged automatically for large batches)
+                    'paramstyle': 'qmark',
                 }
                 
                 # Add optional schema if provided
@@ -142,6 +156,8 @@ class OlistSnowflakeUploader:
                     conn_params['schema'] = self.config['schema']
                 
                 self.conn = snowflake.connector.connect(**conn_params)
+                # Skip client telemetry beacons during bulk loads
+                self.conn.telemetry_enabled = False
                 self.cursor = self.conn.cursor()
                 logger.info("✓ Connected to Snowflake successfully")
                 
@@ -149,6 +165,12 @@ class OlistSnowflakeUploader:
                 self.cursor.execute("ALTER SESSION SET TIMESTAMP_INPUT_FORMAT = 'YYYY-MM-DD HH24:MI:SS'")
                 self.cursor.execute("ALTER SESSION SET TIMESTAMP_OUTPUT_FORMAT = 'YYYY-MM-DD HH24:MI:SS'")
                 
+                # Resume the warehouse up front so the first load doesn't stall on cold start
+                try:
+                    self.cursor.execute(f"ALTER WAREHOUSE {conn_params['warehouse']} RESUME IF SUSPENDED")
+                except snowflake.connector.errors.ProgrammingError as e:
+                    logger.warning(f"Could not resume warehouse {conn_params['warehouse']}: {e}")
+                
                 return True
             except snowflake.connector.errors.OperationalError as e:
                 error_msg = str(e)
@@ -181,8 +203,10 @@ class OlistSnowflakeUploader:
         """Close Snowflake connection."""
         if self.cursor:
             self.cursor.close()
+            self.cursor = None
         if self.conn:
             self.conn.close()
+            self.conn = None
         logger.info("Disconnected from Snowflake")
     
     def setup_schemas(self):
@@ -190,27 +214,47 @@ class OlistSnowflakeUploader:
         schemas = ['OLIST_SALES', 'OLIST_MARKETING', 'OLIST_ANALYTICS']
         
         logger.info("\n🔧 Setting up schemas...")
-        for schema in schemas:
-            try:
-                self.cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+        # One multi-statement request instead of a round-trip per schema
+        ddl = "; ".join(f"CREATE SCHEMA IF NOT EXISTS {schema}" for schema in schemas)
+        try:
+            self.cursor.execute(ddl, num_statements=len(schemas))
+            for schema in schemas:
                 logger.info(f"  ✓ {schema}")
-            except Exception as e:
-                logger.error(f"  ✗ Failed to create schema {schema}: {e}")
-                raise
+        except Exception as e:
+            logger.error(f"  ✗ Failed to create schemas {', '.join(schemas)}: {e}")
+            raise
     
-    def create_table(self, schema: str, table_name: str):
-        """Create table with proper schema definition."""
+    def _arrow_schema(self, table_name: str) -> Dict[str, pa.DataType]:
+        """Map a table's Snowflake column types to Arrow types for CSV parsing."""
+        arrow_types = {}
+        for col, dtype in self.table_schemas[table_name].items():
+            if dtype.startswith('VARCHAR'):
+                arrow_types[col] = pa.string()
+            elif dtype == 'INTEGER':
+                arrow_types[col] = pa.int64()
+            elif dtype == 'FLOAT':
+                arrow_types[col] = pa.float64()
+            elif 'TIMESTAMP' in dtype:
+                arrow_types[col] = pa.timestamp('us')
+        return arrow_types
+    
+    def _create_table_sql(self, schema: str, table_name: str) -> str:
+        """Build the CREATE OR REPLACE TABLE statement for a defined table."""
         if table_name not in self.table_schemas:
             raise ValueError(f"No schema definition for table: {table_name}")
         
         columns = self.table_schemas[table_name]
         column_defs = ", ".join([f'"{col}" {dtype}' for col, dtype in columns.items()])
         
-        create_sql = f"""
+        return f"""
         CREATE OR REPLACE TABLE {schema}.{table_name} (
             {column_defs}
         )
         """
+    
+    def create_table(self, schema: str, table_name: str):
+        """Create table with proper schema definition."""
+        create_sql = self._create_table_sql(schema, table_name)
         
         try:
             self.cursor.execute(create_sql)
@@ -219,7 +263,69 @@ class OlistSnowflakeUploader:
             logger.error(f"  ✗ Failed to create table {schema}.{table_name}: {e}")
             raise
     
-    def load_csv_to_table(self, schema: str, table_name: str, csv_file: str, chunk_size: int = 50000):
+    def create_tables(self, schema: str, table_names: List[str]):
+        """Create several tables in a single multi-statement request."""
+        create_sql = ";".join(self._create_table_sql(schema, name) for name in table_names)
+        
+        try:
+            self.cursor.execute(create_sql, num_statements=len(table_names))
+            for table_name in table_names:
+                logger.info(f"  ✓ Created table {schema}.{table_name}")
+        except Exception as e:
+            logger.error(f"  ✗ Failed to create tables in {schema}: {e}")
+            raise
+    
+    def _copy_into_table(self, schema: str, table_name: str, csv_path: Path) -> bool:
+        """
+        Stage a CSV file and load it with COPY INTO, letting Snowflake coerce
+        types server-side from the target table's column definitions.
+        
+        Args:
+            schema: Target schema name
+            table_name: Target table name
+            csv_path: Local path to the CSV file
+        """
+        table_stage = f"@{schema}.%{table_name}"
+        
+        # Upload to the table's internal stage (compressed on the client)
+        self.cursor.execute(
+            f"PUT 'file://{csv_path.resolve().as_posix()}' {table_stage} "
+            f"AUTO_COMPRESS=TRUE OVERWRITE=TRUE"
+        )
+        
+        copy_sql = f"""
+        COPY INTO {schema}.{table_name}
+        FROM {table_stage}
+        FILE_FORMAT = (
+            TYPE = CSV
+            SKIP_HEADER = 1
+            FIELD_OPTIONALLY_ENCLOSED_BY = '"'
+            TIMESTAMP_FORMAT = 'YYYY-MM-DD HH24:MI:SS'
+            NULL_IF = ('', 'NA', 'NaN', 'NULL')
+            EMPTY_FIELD_AS_NULL = TRUE
+        )
+        ON_ERROR = 'CONTINUE'
+        PURGE = TRUE
+        """
+        self.cursor.execute(copy_sql)
+        # Result columns: file, status, rows_parsed, rows_loaded, ...
+        rows_loaded = sum(row[3] or 0 for row in self.cursor.fetchall())
+        
+        # Audit rows rejected by ON_ERROR = 'CONTINUE'
+        self.cursor.execute(
+            f"SELECT * FROM TABLE(VALIDATE({schema}.{table_name}, JOB_ID => '_last'))"
+        )
+        rejected = self.cursor.fetchall()
+        if rejected:
+            logger.warning(f"  ⚠ {len(rejected):,} rows rejected while loading {table_name}")
+            for error in rejected[:5]:
+                logger.warning(f"    {error[0]}")
+        
+        logger.info(f"  ✓ Loaded {rows_loaded:,} rows into {schema}.{table_name} (COPY INTO)")
+        return True
+    
+    def load_csv_to_table(self, schema: str, table_name: str, csv_file: str,
+                          chunk_size: int = 50000, use_copy: Optional[bool] = None):
         """
         Load CSV data into Snowflake table in chunks with proper type handling.
         
@@ -228,58 +334,95 @@ class OlistSnowflakeUploader:
             table_name: Target table name
             csv_file: CSV filename
             chunk_size: Number of rows per batch insert
+            use_copy: Load via PUT + COPY INTO instead of client-side batch inserts.
+                Defaults to choosing by file size (see COPY_THRESHOLD_BYTES).
         """
         csv_path = self.data_folder / csv_file
         
-        if not csv_path.exists():
+        try:
+            file_size = csv_path.stat().st_size
+        except FileNotFoundError:
             logger.warning(f"  ⚠ CSV file not found: {csv_path}")
             return False
         
+        if file_size == 0:
+            logger.warning(f"  ⚠ CSV file is empty: {csv_path}")
+            return False
+        
+        if use_copy is None:
+            use_copy = file_size >= self.COPY_THRESHOLD_BYTES
+        
         logger.info(f"\n📥 Loading {table_name} from {csv_file}")
         
         try:
-            # Read CSV with proper handling
-            df = pd.read_csv(csv_path, low_memory=False)
+            if use_copy:
+                return self._copy_into_table(schema, table_name, csv_path)
+            
+            # Read CSV with Arrow's multithreaded parser, typed from the schema
+            # definition (keeps zip code prefixes as strings). Quoted review
+            # comments contain line breaks, hence newlines_in_values.
+            def read_csv(column_types):
+                return pacsv.read_csv(
+                    csv_path,
+                    read_options=pacsv.ReadOptions(block_size=64 << 20, use_threads=True),
+                    parse_options=pacsv.ParseOptions(newlines_in_values=True),
+                    convert_options=pacsv.ConvertOptions(
+                        column_types=column_types,
+                        null_values=['', 'NA', 'NaN'],
+                        strings_can_be_null=True
+                    )
+                )
+            
+            arrow_schema = self._arrow_schema(table_name)
+            try:
+                table = read_csv(arrow_schema)
+            except pa.ArrowInvalid as e:
+                # A malformed value fails the whole typed read; read as text and
+                # let the coercion below turn bad values into NULLs instead
+                logger.warning(f"  ⚠ Typed CSV read failed ({e}); reading as text and coercing")
+                table = read_csv({col: pa.string() for col in arrow_schema})
+            # self_destruct releases Arrow buffers as columns are converted
+            df = table.to_pandas(self_destruct=True)
+            del table
             total_rows = len(df)
             logger.info(f"  Read {total_rows:,} rows from CSV")
             
             # Get column names from schema definition
-            schema_columns = list(self.table_schemas[table_name].keys())
+            schema_def = self.table_schemas[table_name]
+            schema_columns = list(schema_def.keys())
             csv_columns = [col.lower().replace(' ', '_') for col in df.columns]
             
             # Rename DataFrame columns to match schema
             df.columns = schema_columns[:len(df.columns)]
             
-            # Handle timestamp columns - convert to string format for Snowflake
-            for col, dtype in self.table_schemas[table_name].items():
-                if col in df.columns:
+            # Coerce column types - timestamps stay as datetime64 so the driver
+            # binds them directly (NaT becomes None in the NULL mask below)
+            df_columns = set(df.columns)
+            for col, dtype in schema_def.items():
+                if col in df_columns:
                     if 'TIMESTAMP' in dtype:
-                        # Convert to datetime then to string format Snowflake expects
-                        df[col] = pd.to_datetime(df[col], errors='coerce')
-                        # Convert to string, replacing NaT with None
-                        df[col] = df[col].dt.strftime('%Y-%m-%d %H:%M:%S').where(df[col].notna(), None)
+                        df[col] = pd.to_datetime(df[col], errors='coerce').astype('datetime64[us]')
                     elif dtype == 'INTEGER':
                         df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
                     elif dtype == 'FLOAT':
                         df[col] = pd.to_numeric(df[col], errors='coerce')
             
-            # Replace NaN with None for proper NULL handling (but skip timestamp columns already handled)
-            for col in df.columns:
-                if self.table_schemas[table_name].get(col, '') not in ['TIMESTAMP_NTZ', 'TIMESTAMP']:
-                    df[col] = df[col].where(pd.notnull(df[col]), None)
+            # Replace NaN with None for proper NULL handling - one fused mask
+            # over the whole frame instead of a .where() per column
+            values = df.astype(object).where(df.notna(), None).to_numpy()
+            
+            # Build INSERT statement with quoted column names once for all chunks
+            columns_str = ", ".join([f'"{col}"' for col in df.columns])
+            placeholders = ", ".join(["?"] * len(df.columns))
+            insert_sql = f'INSERT INTO {schema}.{table_name} ({columns_str}) VALUES ({placeholders})'
             
             # Insert in chunks
             rows_inserted = 0
             for i in range(0, total_rows, chunk_size):
-                chunk = df.iloc[i:i + chunk_size]
-                
-                # Build INSERT statement with quoted column names
-                columns_str = ", ".join([f'"{col}"' for col in chunk.columns])
-                placeholders = ", ".join(["%s"] * len(chunk.columns))
-                insert_sql = f'INSERT INTO {schema}.{table_name} ({columns_str}) VALUES ({placeholders})'
+                chunk = values[i:i + chunk_size]
                 
-                # Convert to list of tuples
-                data = [tuple(row) for row in chunk.values]
+                # Convert to list of tuples (C-level map, no per-row Python frame)
+                data = list(map(tuple, chunk))
                 
                 # Execute batch insert
                 self.cursor.executemany(insert_sql, data)
@@ -289,6 +432,10 @@ class OlistSnowflakeUploader:
                     logger.info(f"    Inserted {rows_inserted:,} / {total_rows:,} rows")
             
             logger.info(f"  ✓ Loaded {rows_inserted:,} rows into {schema}.{table_name}")
+            
+            # Release this table's buffers before the next one is read
+            del df, values
+            gc.collect()
             return True
             
         except Exception as e:
@@ -307,9 +454,10 @@ class OlistSnowflakeUploader:
         
         for source_table, target_table in duplicate_mappings.items():
             try:
+                # Zero-copy clone - metadata only, no warehouse compute
                 sql = f"""
-                CREATE OR REPLACE TABLE OLIST_MARKETING.{target_table} AS 
-                SELECT * FROM OLIST_SALES.{source_table}
+                CREATE OR REPLACE TABLE OLIST_MARKETING.{target_table}
+                CLONE OLIST_SALES.{source_table}
                 """
                 self.cursor.execute(sql)
                 
@@ -379,29 +527,40 @@ class OlistSnowflakeUploader:
         total_tables = 0
         successful_tables = 0
         
+        # Snowflake keeps ROW_COUNT current in INFORMATION_SCHEMA, so a single
+        # metadata query replaces a COUNT(*) per table
+        schema_names = list(schemas_to_check.keys())
+        placeholders = ", ".join(["?"] * len(schema_names))
+        self.cursor.execute(
+            f"SELECT TABLE_SCHEMA, TABLE_NAME, ROW_COUNT FROM INFORMATION_SCHEMA.TABLES "
+            f"WHERE TABLE_SCHEMA IN ({placeholders})",
+            schema_names
+        )
+        counts = {(row[0], row[1]): row[2] or 0 for row in self.cursor.fetchall()}
+        
         for schema, tables in schemas_to_check.items():
             logger.info(f"\n{schema}:")
             for table in tables:
-                try:
-                    self.cursor.execute(f"SELECT COUNT(*) FROM {schema}.{table}")
-                    count = self.cursor.fetchone()[0]
-                    logger.info(f"  ✓ {table}: {count:,} rows")
-                    total_tables += 1
-                    if count > 0:
-                        successful_tables += 1
-                except Exception as e:
-                    logger.warning(f"  ✗ {table}: {e}")
-                    total_tables += 1
+                total_tables += 1
+                if (schema, table) not in counts:
+                    logger.warning(f"  ✗ {table}: table not found")
+                    continue
+                count = counts[(schema, table)]
+                logger.info(f"  ✓ {table}: {count:,} rows")
+                if count > 0:
+                    successful_tables += 1
         
         logger.info(f"\n📊 Summary: {successful_tables}/{total_tables} tables loaded successfully")
         return successful_tables == total_tables
     
-    def run_complete_upload(self, create_duplicates: bool = True):
+    def run_complete_upload(self, create_duplicates: bool = True, keep_connection: bool = False):
         """
         Run the complete upload process.
         
         Args:
             create_duplicates: Whether to create duplicate tables for testing
+            keep_connection: Leave the connection open so repeated runs skip
+                re-authentication (call disconnect() when done)
         """
         start_time = time.time()
         
@@ -414,8 +573,8 @@ class OlistSnowflakeUploader:
             
             # Load all base tables into OLIST_SALES
             logger.info("\n📦 Loading base tables into OLIST_SALES...")
+            self.create_tables('OLIST_SALES', list(self.csv_files.keys()))
             for table_name, csv_file in self.csv_files.items():
-                self.create_table('OLIST_SALES', table_name)
                 self.load_csv_to_table('OLIST_SALES', table_name, csv_file)
             
             # Create duplicate tables if requested
@@ -440,7 +599,8 @@ class OlistSnowflakeUploader:
             logger.error(f"\n❌ Upload failed: {e}")
             raise
         finally:
-            self.disconnect()
+            if not keep_connection:
+                self.disconnect()
 
 
 def main():
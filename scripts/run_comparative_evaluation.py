@@ -7,13 +7,31 @@ Runs 4 systems on same questions and compares performance
 Uses manual McNemar test with chi-square approximation
 """
 
+import argparse
+import hashlib
+import inspect
 import json
 import sys
 import os
+import threading
 import time
 import math
+import mmap
+from collections import Counter
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import numpy as np
+import orjson
+from neo4j import GraphDatabase
+from scipy.special import erfc
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 # ========================================
 # PATH SETUP
 # ========================================
@@ -23,6 +41,8 @@ sys.path.insert(0, PROJECT_ROOT)
 
 QUESTIONS_PATH = os.path.join(PROJECT_ROOT, 'data', 'evaluation', 'benchmark_questions.json')
 RESULTS_PATH = os.path.join(PROJECT_ROOT, 'data', 'evaluation', 'comparative_results.json')
+QUERY_CACHE_DIR = os.path.join(PROJECT_ROOT, 'data', 'evaluation', 'query_cache')
+MODELS_DIR = os.path.join(PROJECT_ROOT, 'models')
 
 print(f"📁 Project root: {PROJECT_ROOT}")
 print(f"📋 Questions path: {QUESTIONS_PATH}")
@@ -31,6 +51,7 @@ print(f"📊 Results path: {RESULTS_PATH}")
 from src.graphrag.smart_graphrag_engine import SmartGraphRAGEngine
 from src.evaluation.baseline_systems import KeywordSearchBaseline, EmbeddingsOnlyBaseline, GraphOnlyBaseline
 from src.graphrag.learned_graphrag_engine import LearnedGraphRAGEngine
+from src.common.graph_version import graph_version as read_graph_version
 
 
 
@@ -38,6 +59,29 @@ from src.graphrag.learned_graphrag_engine import LearnedGraphRAGEngine
 # STATISTICAL FUNCTIONS
 # ========================================
 
+_SQRT2 = math.sqrt(2.0)
+
+
+def mcnemar_test_batch(bs, cs):
+    """
+    McNemar test over many contingency tables at once
+    
+    bs/cs are the discordant counts (baseline only / graphrag only correct)
+    for each table. Returns arrays of chi-square statistics and p-values.
+    """
+    b = np.asarray(bs, dtype=np.float64)
+    c = np.asarray(cs, dtype=np.float64)
+    n = b + c
+    
+    # McNemar test statistic with continuity correction (0 where b + c == 0)
+    chi_square = np.divide((np.abs(b - c) - 1) ** 2, n, out=np.zeros_like(n), where=n > 0)
+    
+    # P(χ² > x) for df=1 using complementary error function
+    pvalue = np.where(n > 0, erfc(np.sqrt(chi_square) / _SQRT2), 1.0)
+    
+    return chi_square, pvalue
+
+
 def mcnemar_test_manual(contingency_table):
     """
     Improved manual McNemar test with accurate p-value
@@ -47,47 +91,52 @@ def mcnemar_test_manual(contingency_table):
     b = contingency_table[0][1]  # baseline only correct
     c = contingency_table[1][0]  # graphrag only correct
     
-    if b + c == 0:
-        return 0.0, 1.0
-    
-    # McNemar test statistic with continuity correction
-    numerator = (abs(b - c) - 1) ** 2
-    denominator = b + c
-    chi_square = numerator / denominator
-    
-    # Accurate p-value using error function
-    z = math.sqrt(chi_square)
-    try:
-        # P(χ² > x) for df=1 using complementary error function
-        pvalue = math.erfc(z / math.sqrt(2))
-    except:
-        # Fallback to lookup if erfc fails
-        if chi_square >= 10.83:
-            pvalue = 0.001
-        elif chi_square >= 6.63:
-            pvalue = 0.01
-        elif chi_square >= 3.84:
-            pvalue = 0.049  # Just below 0.05
-        elif chi_square >= 2.71:
-            pvalue = 0.10
-        else:
-            pvalue = 0.20
-    
-    return chi_square, pvalue
+    chi_square, pvalue = mcnemar_test_batch([b], [c])
+    return float(chi_square[0]), float(pvalue[0])
 
 
 # ========================================
 # HELPER FUNCTIONS
 # ========================================
 
+@lru_cache(maxsize=4096)
 def normalize_table_name(table_name):
     """Normalize table names for comparison"""
     if not table_name:
         return ""
-    parts = table_name.upper().split('.')
-    if len(parts) >= 2:
-        return '.'.join(parts[-2:])
-    return table_name.upper()
+    # Keep only the last two dot-separated parts (SCHEMA.TABLE) without
+    # splitting the whole name into a list
+    head, sep, last = table_name.rpartition('.')
+    if not sep:
+        return table_name.upper()
+    return (head.rpartition('.')[2] + '.' + last).upper()
+
+
+def prepare_question(question):
+    """Cache normalized ground-truth / acceptable names on the question"""
+    question['_gt_norm'] = [normalize_table_name(gt) for gt in question['ground_truth']]
+    question['_acc_norm'] = [normalize_table_name(acc) for acc in question.get('acceptable', [])]
+    
+    # One automaton per question finds every GT/acceptable name contained in
+    # a result in a single C-level scan (pyahocorasick is optional)
+    question['_gt_auto'] = None
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for acc in question['_acc_norm']:
+            if acc:
+                automaton.add_word(acc, 'acceptable')
+        for gt in question['_gt_norm']:
+            if gt:
+                automaton.add_word(gt, 'exact')  # exact wins over acceptable
+        if len(automaton) > 0:
+            automaton.make_automaton()
+            question['_gt_auto'] = automaton
+    return question
+
+
+def _contains_either(a, b):
+    """True if either string contains the other; only the shorter can fit in the longer"""
+    return (a in b) if len(a) <= len(b) else (b in a)
 
 
 def is_correct(result_table, question):
@@ -95,111 +144,275 @@ def is_correct(result_table, question):
     if not result_table:
         return 'wrong', False
     
+    if '_gt_norm' not in question:
+        prepare_question(question)
+    
     result_normalized = normalize_table_name(result_table)
     
-    for gt in question['ground_truth']:
-        gt_normalized = normalize_table_name(gt)
-        if gt_normalized in result_normalized or result_normalized in gt_normalized:
+    automaton = question['_gt_auto']
+    if automaton is not None:
+        # Forward direction (name in result) via the automaton, the reverse
+        # (result in name) with a plain scan
+        found = {match_type for _, match_type in automaton.iter(result_normalized)}
+        result_len = len(result_normalized)
+        if 'exact' in found or any(
+                len(gt) >= result_len and result_normalized in gt for gt in question['_gt_norm']):
+            return 'exact', True
+        if found or any(
+                len(acc) >= result_len and result_normalized in acc for acc in question['_acc_norm']):
+            return 'acceptable', True
+        return 'wrong', False
+    
+    for gt_normalized in question['_gt_norm']:
+        if _contains_either(gt_normalized, result_normalized):
             return 'exact', True
     
-    for acc in question.get('acceptable', []):
-        acc_normalized = normalize_table_name(acc)
-        if acc_normalized in result_normalized or result_normalized in acc_normalized:
+    for acc_normalized in question['_acc_norm']:
+        if _contains_either(acc_normalized, result_normalized):
             return 'acceptable', True
     
     return 'wrong', False
 
 
-def evaluate_system(system_name, system, questions):
-    """Run one system on all questions"""
+def graph_version():
+    """Fingerprint of the Neo4j graph every system reads (see src.common.graph_version)"""
+    driver = GraphDatabase.driver(
+        "bolt://localhost:7687",
+        auth=("neo4j", os.getenv('NEO4J_PASSWORD'))
+    )
+    try:
+        with driver.session() as session:
+            return read_graph_version(session)
+    finally:
+        driver.close()
+
+
+def system_version(system):
+    """
+    Fingerprint of a system's code and trained models
     
-    print(f"\n{'='*70}")
-    print(f"EVALUATING: {system_name}")
-    print(f"{'='*70}")
+    Hashes the source file defining the system's class and the size/mtime
+    of everything under models/ (route classifier, encoders).
+    """
+    h = hashlib.blake2b(type(system).__qualname__.encode(), digest_size=16)
+    try:
+        with open(inspect.getsourcefile(type(system)), 'rb') as f:
+            h.update(f.read())
+    except (OSError, TypeError):
+        pass
+    if os.path.isdir(MODELS_DIR):
+        for name in sorted(os.listdir(MODELS_DIR)):
+            st = os.stat(os.path.join(MODELS_DIR, name))
+            h.update(f"{name}:{st.st_size}:{st.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+class QueryCache:
+    """
+    On-disk cache of system responses, one JSON file per question
     
-    results = []
-    success_at_1 = 0
-    success_at_3 = 0
-    total_time = 0
+    Keys cover system name, system_version() (code + models), the graph
+    fingerprint from graph_version(), top_k and the question text, so a
+    code change, retrained model or re-ingested graph misses the cache.
+    The original query latency is stored with the response so cached runs
+    still report real timings.
+    """
     
-    for i, question in enumerate(questions, 1):
-        q_text = question['question']
-        q_id = question['id']
-        
-        print(f"\n[{i}/{len(questions)}] {q_text}")
-        
-        start_time = time.time()
+    def __init__(self, system_name, system, graph_fingerprint, cache_dir=QUERY_CACHE_DIR):
+        self.prefix = f"{system_name}:{system_version(system)}:{graph_fingerprint}"
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def _path(self, q_text, top_k):
+        key = hashlib.blake2b(f"{self.prefix}:{top_k}:{q_text}".encode(), digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def get(self, q_text, top_k):
+        """Return (response, elapsed_seconds) or None on a miss"""
         try:
+            with open(self._path(q_text, top_k), 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry['response'], entry['elapsed']
+    
+    def set(self, q_text, top_k, response, elapsed):
+        path = self._path(q_text, top_k)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'response': response, 'elapsed': elapsed}, f, default=str)
+        os.replace(tmp_path, path)
+
+
+_TABLE_KEYS = ('table', 'name', 'table_name', 'full_name', 'table1', 'table2')
+
+
+def extract_table_name(result):
+    """First non-empty table name field of a result, or None"""
+    for key in _TABLE_KEYS:
+        if result.get(key):
+            return result[key]
+    return None
+
+
+def evaluate_question(system, question, index, total, response=None, elapsed=None, cache=None):
+    """
+    Run one question through a system and score it
+    
+    If response is given (from a batched query) the system is not called.
+    Returns (result, elapsed_seconds, log_lines); log lines are returned
+    rather than printed so parallel runs still print in question order.
+    """
+    q_text = question['question']
+    q_id = question['id']
+    lines = [f"\n[{index}/{total}] {q_text}"]
+    
+    start_time = time.time()
+    try:
+        if response is None and cache is not None:
+            cached = cache.get(q_text, 10)
+            if cached is not None:
+                response, elapsed = cached
+        
+        if response is None:
             response = system.query(q_text, top_k=10)
             elapsed = time.time() - start_time
-            total_time += elapsed
-            
-            top_results = response.get('results', [])[:10]
-            
-            if not top_results:
-                print("  ❌ No results returned")
-                results.append({
-                    'question_id': q_id,
-                    'question': q_text,
-                    'category': question.get('category', 'unknown'),
-                    'top_1': None,
-                    'top_3': [],
-                    'top_10': [],
-                    'correct_at_1': False,
-                    'correct_at_3': False,
-                    'time_ms': elapsed * 1000
-                })
-                continue
-            
-            def extract_table_name(result):
-                for key in ['table', 'name', 'table_name', 'full_name', 'table1', 'table2']:
-                    if key in result and result[key]:
-                        return result[key]
-                return None
-            
-            top_1_table = extract_table_name(top_results[0])
-            top_3_tables = [extract_table_name(r) for r in top_results[:3] if extract_table_name(r)]
-            top_10_tables = [extract_table_name(r) for r in top_results[:10] if extract_table_name(r)]
-            
-            match_1, correct_1 = is_correct(top_1_table, question)
-            correct_3 = any(is_correct(t, question)[1] for t in top_3_tables if t)
-            
-            if correct_1:
-                success_at_1 += 1
-                print(f"  ✅ Correct at 1: {top_1_table}")
-            else:
-                print(f"  ❌ Wrong at 1: {top_1_table}")
-                print(f"     Expected: {question['ground_truth']}")
-            
-            if correct_3:
-                success_at_3 += 1
-                if not correct_1:
-                    print(f"  ⚠️  Correct in top-3")
-            
-            results.append({
-                'question_id': q_id,
-                'question': q_text,
-                'category': question.get('category', 'unknown'),
-                'top_1': top_1_table,
-                'top_3': top_3_tables,
-                'top_10': top_10_tables,
-                'correct_at_1': correct_1,
-                'correct_at_3': correct_3,
-                'time_ms': elapsed * 1000,
-                'ground_truth': question['ground_truth']
-            })
-            
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
-            results.append({
+            if cache is not None:
+                cache.set(q_text, 10, response, elapsed)
+        
+        top_results = response.get('results', [])[:10]
+        
+        if not top_results:
+            lines.append("  ❌ No results returned")
+            return {
                 'question_id': q_id,
                 'question': q_text,
                 'category': question.get('category', 'unknown'),
-                'error': str(e),
+                'top_1': None,
+                'top_3': [],
+                'top_10': [],
                 'correct_at_1': False,
                 'correct_at_3': False,
-                'time_ms': 0
-            })
+                'time_ms': elapsed * 1000
+            }, elapsed, lines
+        
+        # Extract each result's table name once, then slice
+        names = [extract_table_name(r) for r in top_results]
+        top_1_table = names[0]
+        top_3_tables = [t for t in names[:3] if t]
+        top_10_tables = [t for t in names if t]
+        
+        # One pass over the ranked tables yields top-1, top-3 and MRR;
+        # top_3_tables is always a prefix of top_10_tables
+        first_correct_rank = None
+        for rank, table in enumerate(top_10_tables, 1):
+            if is_correct(table, question)[1]:
+                first_correct_rank = rank
+                break
+        
+        correct_1 = top_1_table is not None and first_correct_rank == 1
+        correct_3 = first_correct_rank is not None and first_correct_rank <= len(top_3_tables)
+        
+        if correct_1:
+            lines.append(f"  ✅ Correct at 1: {top_1_table}")
+        else:
+            lines.append(f"  ❌ Wrong at 1: {top_1_table}")
+            lines.append(f"     Expected: {question['ground_truth']}")
+        
+        if correct_3 and not correct_1:
+            lines.append(f"  ⚠️  Correct in top-3")
+        
+        return {
+            'question_id': q_id,
+            'question': q_text,
+            'category': question.get('category', 'unknown'),
+            'top_1': top_1_table,
+            'top_3': top_3_tables,
+            'top_10': top_10_tables,
+            'correct_at_1': correct_1,
+            'correct_at_3': correct_3,
+            'first_correct_rank': first_correct_rank,
+            'time_ms': elapsed * 1000,
+            'ground_truth': question['ground_truth']
+        }, elapsed, lines
+        
+    except Exception as e:
+        lines.append(f"  ❌ Error: {e}")
+        return {
+            'question_id': q_id,
+            'question': q_text,
+            'category': question.get('category', 'unknown'),
+            'error': str(e),
+            'correct_at_1': False,
+            'correct_at_3': False,
+            'time_ms': 0
+        }, 0, lines
+
+
+def evaluate_system(system_name, system, questions, max_workers=1, graph_fingerprint=None):
+    """
+    Run one system on all questions
+    
+    Questions run one at a time by default so time_ms is single-query
+    latency; max_workers > 1 overlaps the I/O-bound queries (Neo4j / Milvus
+    round-trips) for faster accuracy-only runs on thread-safe backends.
+    Responses are cached on disk only when graph_fingerprint is given
+    (see graph_version()).
+    """
+    
+    print(f"\n{'='*70}")
+    print(f"EVALUATING: {system_name}")
+    print(f"{'='*70}")
+    
+    total = len(questions)
+    results = [None] * total
+    total_time = 0
+    cache = QueryCache(system_name, system, graph_fingerprint) if graph_fingerprint else None
+    
+    # Systems with a batch API answer every uncached question in one call (one
+    # embedding pass / one search request); time is split evenly per question
+    responses = None
+    if hasattr(system, 'query_batch') and total > 0:
+        cached = [cache.get(q['question'], 10) if cache else None for q in questions]
+        missing = [i for i, entry in enumerate(cached) if entry is None]
+        try:
+            if missing:
+                start_time = time.time()
+                batch = system.query_batch([questions[i]['question'] for i in missing], top_k=10)
+                if len(batch) != len(missing):
+                    raise ValueError(f"query_batch returned {len(batch)} responses for {len(missing)} questions")
+                batch_elapsed = (time.time() - start_time) / len(missing)
+                for i, response in zip(missing, batch):
+                    cached[i] = (response, batch_elapsed)
+                    if cache is not None:
+                        cache.set(questions[i]['question'], 10, response, batch_elapsed)
+            responses = cached
+        except Exception as e:
+            print(f"  ⚠️  Batch query failed, falling back to per-question queries: {e}")
+    
+    if responses is not None:
+        for idx, (question, (response, batch_elapsed)) in enumerate(zip(questions, responses)):
+            result, elapsed, lines = evaluate_question(
+                system, question, idx + 1, total, response=response, elapsed=batch_elapsed
+            )
+            results[idx] = result
+            total_time += elapsed
+            print("\n".join(lines))
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(evaluate_question, system, question, i, total, cache=cache)
+                for i, question in enumerate(questions, 1)
+            ]
+            # Collect in submission order so output and results match the question file
+            for idx, future in enumerate(futures):
+                result, elapsed, lines = future.result()
+                results[idx] = result
+                total_time += elapsed
+                print("\n".join(lines))
+    
+    success_at_1 = sum(1 for r in results if r['correct_at_1'])
+    success_at_3 = sum(1 for r in results if r['correct_at_3'])
     
     n = len(questions)
     avg_time = (total_time / n) * 1000 if n > 0 else 0
@@ -213,33 +426,19 @@ def evaluate_system(system_name, system, questions):
         'total_questions': n
     }
     
-    mrr_sum = 0
-    for result in results:
-        if result.get('error'):
-            continue
-        for rank, table in enumerate(result.get('top_10', []), 1):
-            question_obj = next((q for q in questions if q['id'] == result['question_id']), None)
-            if question_obj and is_correct(table, question_obj)[1]:
-                mrr_sum += 1 / rank
-                break
+    mrr_sum = sum(1 / r['first_correct_rank'] for r in results if r.get('first_correct_rank'))
     
     metrics['mrr'] = mrr_sum / n if n > 0 else 0
     
-    categories = {}
-    for result in results:
-        cat = result.get('category', 'unknown')
-        if cat not in categories:
-            categories[cat] = {'total': 0, 'correct': 0}
-        categories[cat]['total'] += 1
-        if result.get('correct_at_1'):
-            categories[cat]['correct'] += 1
+    category_totals = Counter(r.get('category', 'unknown') for r in results)
+    category_correct = Counter(r.get('category', 'unknown') for r in results if r.get('correct_at_1'))
     
     metrics['by_category'] = {
         cat: {
-            'success_rate': stats['correct'] / stats['total'] if stats['total'] > 0 else 0,
-            'count': stats['total']
+            'success_rate': category_correct[cat] / count if count > 0 else 0,
+            'count': count
         }
-        for cat, stats in categories.items()
+        for cat, count in category_totals.items()
     }
     
     print(f"\n{'='*70}")
@@ -253,6 +452,7 @@ def evaluate_system(system_name, system, questions):
     print(f"\nBy Category:")
     for cat, stats in metrics['by_category'].items():
         print(f"  {cat}: {stats['success_rate']*100:.1f}% ({stats['count']} questions)")
+    sys.stdout.flush()
     
     return {
         'system': system_name,
@@ -294,6 +494,7 @@ def compare_systems(all_results):
         print("⚠️  No GraphRAG results found")
         return
     
+    comparisons = []
     for baseline in all_results:
         if baseline['system'] == graphrag_results['system']:
             continue
@@ -316,11 +517,19 @@ def compare_systems(all_results):
             else:
                 both_wrong += 1
         
-        contingency = [[both_correct, baseline_only],
-                      [graphrag_only, both_wrong]]
-        
-        chi_square, pvalue = mcnemar_test_manual(contingency)
-        
+        comparisons.append((baseline, both_correct, graphrag_only, baseline_only, both_wrong))
+    
+    if not comparisons:
+        return
+    
+    # One vectorized McNemar test across every baseline
+    chi_squares, pvalues = mcnemar_test_batch(
+        [c[3] for c in comparisons],  # baseline only correct
+        [c[2] for c in comparisons]   # graphrag only correct
+    )
+    
+    for (baseline, both_correct, graphrag_only, baseline_only, both_wrong), chi_square, pvalue in zip(
+            comparisons, chi_squares, pvalues):
         if pvalue is not None:
             # Fix threshold check: use <= 0.05 instead of < 0.05
             significant = "✅ Significant (p≤0.05)" if pvalue <= 0.05 else "❌ Not significant (p>0.05)"
@@ -348,41 +557,48 @@ def save_results(all_results):
     
     os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
     
-    with open(RESULTS_PATH, 'w') as f:
-        json.dump(output, f, indent=2)
+    with open(RESULTS_PATH, 'wb') as f:
+        f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     
     print(f"\n💾 Results saved to: {RESULTS_PATH}")
 
 
-def main():
-    """Run complete comparative evaluation"""
-    
-    print("="*70)
-    print("COMPARATIVE EVALUATION: GraphRAG vs All Baselines")
-    print("="*70)
+def load_questions(questions_path):
+    """Load and prepare benchmark questions; exits if the file is missing"""
+    print(f"\n📂 Loading questions from: {questions_path}")
     
-    print(f"\n📂 Loading questions from: {QUESTIONS_PATH}")
-    
-    if not os.path.exists(QUESTIONS_PATH):
+    if not os.path.exists(questions_path):
         print(f"\n❌ ERROR: Questions file not found!")
         sys.exit(1)
     
-    with open(QUESTIONS_PATH, 'r') as f:
-        questions = json.load(f)
+    # Parse straight out of the mapped file instead of reading a copy first
+    with open(questions_path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+            memoryview(mm) as view:
+        questions = orjson.loads(view)
     
     if isinstance(questions, dict) and 'questions' in questions:
         questions = questions['questions']
     
-    print(f"✅ Loaded {len(questions)} evaluation questions")
+    for question in questions:
+        prepare_question(question)
     
+    print(f"✅ Loaded {len(questions)} evaluation questions")
+    return questions
+
+
+def init_systems():
+    """Initialize all systems in evaluation order as (name, system) pairs"""
     print("\n🚀 Initializing all systems...")
     
     try:
-        smart_graphrag = SmartGraphRAGEngine()
-        learned_graphrag = LearnedGraphRAGEngine()
-        keyword_baseline = KeywordSearchBaseline()
-        embeddings_baseline = EmbeddingsOnlyBaseline()
-        graph_baseline = GraphOnlyBaseline()
+        systems = [
+            ("Smart GraphRAG", SmartGraphRAGEngine()),
+            ("Keyword Search", KeywordSearchBaseline()),
+            ("Embeddings-Only", EmbeddingsOnlyBaseline()),
+            ("Graph-Only", GraphOnlyBaseline()),
+            ("Learned GraphRAG (XGBoost)", LearnedGraphRAGEngine()),
+        ]
         print("✅ All systems initialized successfully")
         
     except Exception as e:
@@ -391,54 +607,170 @@ def main():
         traceback.print_exc()
         sys.exit(1)
     
+    return systems
+
+
+def close_systems(systems):
+    """Close every system's connections"""
+    print("\n🧹 Cleaning up connections...")
+    for _, system in systems:
+        system.close()
+    print("✅ All connections closed")
+
+
+def run_evaluation(systems, questions, use_cache=False, max_workers=1):
+    """Evaluate every system, compare them and save results
+    
+    max_workers > 1 runs each system's questions concurrently (see
+    evaluate_system); time_ms then no longer measures single-query latency.
+    """
     all_results = []
     
+    # Keys the query cache, and tells long-lived systems (--serve) when the
+    # graph changed under their snapshots / in-memory caches
+    try:
+        graph_fingerprint = graph_version()
+    except Exception as e:
+        graph_fingerprint = None
+        print(f"⚠️  Could not fingerprint the graph ({e}); query cache and change checks are off")
+    
+    for i, (name, system) in enumerate(systems, 1):
+        print("\n" + "="*70)
+        print(f"STARTING EVALUATION {i}/{len(systems)}: {name}")
+        print("="*70)
+        if graph_fingerprint is not None and hasattr(system, 'sync_graph_version'):
+            system.sync_graph_version(graph_fingerprint)
+        result = evaluate_system(name, system, questions, max_workers=max_workers,
+                                 graph_fingerprint=graph_fingerprint if use_cache else None)
+        all_results.append(result)
     
-    print("\n" + "="*70)
-    print("STARTING EVALUATION 1/5: Smart GraphRAG")
-    print("="*70)
-    result = evaluate_system("Smart GraphRAG", smart_graphrag, questions)
-    all_results.append(result)
+    compare_systems(all_results)
+    save_results(all_results)
     
     print("\n" + "="*70)
-    print("STARTING EVALUATION 2/5: Keyword Search")
+    print("✅ EVALUATION COMPLETE")
     print("="*70)
-    result = evaluate_system("Keyword Search", keyword_baseline, questions)
-    all_results.append(result)
+    print(f"\n📊 Results saved to: {RESULTS_PATH}")
+    sys.stdout.flush()
     
-    print("\n" + "="*70)
-    print("STARTING EVALUATION 3/5: Embeddings-Only")
-    print("="*70)
-    result = evaluate_system("Embeddings-Only", embeddings_baseline, questions)
-    all_results.append(result)
+    return all_results
+
+
+def serve(port, use_cache=False, max_workers=1):
+    """
+    Keep all systems loaded and run evaluations on request
     
-    print("\n" + "="*70)
-    print("STARTING EVALUATION 4/5: Graph-Only")
-    print("="*70)
-    result = evaluate_system("Graph-Only", graph_baseline, questions)
-    all_results.append(result)
+    Each connection sends one JSON line {"questions_path": ..., "cache": bool,
+    "workers": int (optional, defaults to max_workers)} and receives one JSON line with per-system metrics. Skips the model load
+    and driver handshakes that dominate a cold run.
+    """
+    import socketserver
+    
+    systems = init_systems()
+    
+    class EvaluationHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                request = orjson.loads(self.rfile.readline())
+                questions = load_questions(request.get('questions_path', QUESTIONS_PATH))
+                all_results = run_evaluation(
+                    systems, questions,
+                    use_cache=use_cache or request.get('cache', False),
+                    max_workers=request.get('workers') or max_workers
+                )
+                response = {
+                    'status': 'ok',
+                    'results_path': RESULTS_PATH,
+                    'metrics': {r['system']: r['metrics'] for r in all_results}
+                }
+            except (Exception, SystemExit) as e:
+                response = {'status': 'error', 'error': str(e)}
+            self.wfile.write(orjson.dumps(response, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n")
+    
+    with socketserver.TCPServer(('localhost', port), EvaluationHandler) as server:
+        print(f"\n🛰️  Evaluation server listening on localhost:{port} (Ctrl+C to stop)")
+        sys.stdout.flush()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            close_systems(systems)
+
+
+def run_client(port, questions_path, use_cache=False, max_workers=None):
+    """Ask a running --serve process to evaluate questions_path"""
+    import socket
+    
+    request = {'questions_path': os.path.abspath(questions_path), 'cache': use_cache}
+    if max_workers is not None:
+        request['workers'] = max_workers
+    with socket.create_connection(('localhost', port)) as sock:
+        sock.sendall(orjson.dumps(request) + b"\n")
+        response = orjson.loads(sock.makefile('rb').readline())
+    
+    if response.get('status') != 'ok':
+        print(f"❌ Evaluation failed on server: {response.get('error')}")
+        sys.exit(1)
     
-    print("\n" + "="*70)
-    print("STARTING EVALUATION 5/5: Learned Graph (ML based)")
-    print("="*70)
-    result = evaluate_system("Learned GraphRAG (XGBoost)", learned_graphrag, questions)
-    all_results.append(result)
+    print(f"\n{'System':<30} {'Success@1':<12} {'Success@3':<12} {'MRR':<8}")
+    print("-" * 70)
+    for system_name, m in response['metrics'].items():
+        print(f"{system_name:<30} "
+              f"{m['success@1_rate']*100:>6.1f}%     "
+              f"{m['success@3_rate']*100:>6.1f}%     "
+              f"{m['mrr']:>5.3f}")
+    print(f"\n📊 Results saved to: {response['results_path']}")
+
+
+def main():
+    """Run complete comparative evaluation"""
     
-    compare_systems(all_results)
-    save_results(all_results)
+    parser = argparse.ArgumentParser(description="Comparative evaluation: GraphRAG vs baselines")
+    parser.add_argument('--cache', action='store_true',
+                        help=f"Reuse responses in {QUERY_CACHE_DIR} while code, models "
+                             "and graph are unchanged (default: query every system)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--serve', action='store_true',
+                      help="Load all systems once and serve evaluation requests")
+    mode.add_argument('--client', metavar='QUESTIONS_PATH',
+                      help="Send QUESTIONS_PATH to a running --serve process")
+    parser.add_argument('--port', type=int, default=8765,
+                        help="Port for --serve / --client (default: 8765)")
+    parser.add_argument('--workers', type=int, default=None, metavar='N',
+                        help="Questions in flight per system; above 1, time_ms is no "
+                             "longer single-query latency (default: 1, or the "
+                             "server's setting with --client)")
+    args = parser.parse_args()
+    use_cache = args.cache
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    
+    if args.client:
+        run_client(args.port, args.client, use_cache=use_cache, max_workers=args.workers)
+        return
+    max_workers = args.workers or 1
+    
+    # Block-buffer stdout so per-question output doesn't block the query
+    # loop on every line; evaluate_system flushes once per system
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(line_buffering=False)
+    
+    if args.serve:
+        serve(args.port, use_cache=use_cache, max_workers=max_workers)
+        return
     
-    print("\n" + "="*70)
-    print("✅ EVALUATION COMPLETE")
     print("="*70)
-    print(f"\n📊 Results saved to: {RESULTS_PATH}")
+    print("COMPARATIVE EVALUATION: GraphRAG vs All Baselines")
+    print("="*70)
     
-    print("\n🧹 Cleaning up connections...")
-    smart_graphrag.close()
-    keyword_baseline.close()
-    embeddings_baseline.close()
-    graph_baseline.close()
-    print("✅ All connections closed")
+    questions = load_questions(QUESTIONS_PATH)
+    systems = init_systems()
+    
+    run_evaluation(systems, questions, use_cache=use_cache, max_workers=max_workers)
+    
+    close_systems(systems)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
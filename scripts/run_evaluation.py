@@ -1,9 +1,12 @@
-import json
+import mmap
 import sys
 import os
 import time
+from collections import Counter
 from datetime import datetime
 
+import orjson
+
 # Fix import path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
@@ -103,8 +106,20 @@ def evaluate_graphrag(questions, engine):
                 'success@3': False
             })
     
+    sys.stdout.flush()
     return results
 
+def _group_counts(results, key):
+    """Count total / success@1 / success@3 per value of key (e.g. category)"""
+    totals = Counter(r.get(key, 'unknown') for r in results)
+    success_1 = Counter(r.get(key, 'unknown') for r in results if r.get('success@1'))
+    success_3 = Counter(r.get(key, 'unknown') for r in results if r.get('success@3'))
+    
+    return {
+        group: {'total': total, 'success@1': success_1[group], 'success@3': success_3[group]}
+        for group, total in totals.items()
+    }
+
 def calculate_metrics(results):
     """Calculate aggregate metrics"""
     
@@ -116,29 +131,9 @@ def calculate_metrics(results):
     success_1 = sum(1 for r in results if r.get('success@1', False))
     success_3 = sum(1 for r in results if r.get('success@3', False))
     
-    # By category
-    categories = {}
-    for r in results:
-        cat = r.get('category', 'unknown')
-        if cat not in categories:
-            categories[cat] = {'total': 0, 'success@1': 0, 'success@3': 0}
-        categories[cat]['total'] += 1
-        if r.get('success@1'):
-            categories[cat]['success@1'] += 1
-        if r.get('success@3'):
-            categories[cat]['success@3'] += 1
-    
-    # By difficulty
-    difficulties = {}
-    for r in results:
-        diff = r.get('difficulty', 'unknown')
-        if diff not in difficulties:
-            difficulties[diff] = {'total': 0, 'success@1': 0, 'success@3': 0}
-        difficulties[diff]['total'] += 1
-        if r.get('success@1'):
-            difficulties[diff]['success@1'] += 1
-        if r.get('success@3'):
-            difficulties[diff]['success@3'] += 1
+    # By category / difficulty
+    categories = _group_counts(results, 'category')
+    difficulties = _group_counts(results, 'difficulty')
     
     # Average response time
     response_times = [r.get('response_time_ms', 0) for r in results if 'response_time_ms' in r]
@@ -217,8 +212,8 @@ def save_results(results, metrics, filename='graphrag_results.json'):
     output_path = os.path.join('data', 'evaluation', filename)
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
-    with open(output_path, 'w') as f:
-        json.dump(output, f, indent=2)
+    with open(output_path, 'wb') as f:
+        f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     
     print(f"✅ Results saved to: {output_path}")
 
@@ -229,6 +224,11 @@ def save_results(results, metrics, filename='graphrag_results.json'):
 def main():
     """Run complete evaluation pipeline"""
     
+    # Block-buffer stdout so per-question output doesn't block the query
+    # loop on every line; evaluate_graphrag flushes when it finishes
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(line_buffering=False)
+    
     # Load questions
     questions_path = 'data/evaluation/benchmark_questions.json'
     
@@ -237,8 +237,11 @@ def main():
         print("   Please create the benchmark_questions.json file first")
         return
     
-    with open(questions_path, 'r') as f:
-        questions = json.load(f)
+    # Parse straight out of the mapped file instead of reading a copy first
+    with open(questions_path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+            memoryview(mm) as view:
+        questions = orjson.loads(view)
     
     print(f"📋 Loaded {len(questions)} evaluation questions")
     print(f"   Categories: {set(q['category'] for q in questions)}")
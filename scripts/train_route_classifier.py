@@ -7,8 +7,9 @@ import json
 import sys
 import os
 import joblib
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import cross_val_score, StratifiedKFold
+from sklearn.model_selection import StratifiedKFold
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report, confusion_matrix
 import xgboost as xgb
@@ -43,8 +44,9 @@ def train_classifier():
     
     df = pd.DataFrame(data)
     
-    # Separate features and labels
-    X = df.drop(['best_route', 'question'], axis=1)
+    # Separate features and labels; dense float32 features let XGBoost skip
+    # its object-dtype coercion on every fold
+    X = df.drop(['best_route', 'question'], axis=1).astype(np.float32)
     y = df['best_route']
     
     print(f"\n📊 Dataset Info:")
@@ -56,7 +58,7 @@ def train_classifier():
     
     # Encode labels
     le = LabelEncoder()
-    y_encoded = le.fit_transform(y)
+    y_encoded = le.fit_transform(y).astype(np.int32)
     
     print(f"\n   Encoded labels: {list(le.classes_)}")
     
@@ -74,17 +76,30 @@ def train_classifier():
         reg_lambda=1.0,         # L2 regularization
         random_state=42,
         objective='multi:softmax',
-        num_class=len(le.classes_)
+        num_class=len(le.classes_),
+        tree_method='hist',
+        enable_categorical=False
     )
     
-    # Cross-validation (important for small datasets!)
+    # Cross-validation (important for small datasets!) with XGBoost's native
+    # API: the DMatrix is built once and shared by all folds. Booster params
+    # come from the classifier so CV always scores the model that is trained.
     print(f"\n🔄 Running 5-fold cross-validation...")
     cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-    cv_scores = cross_val_score(model, X, y_encoded, cv=cv, scoring='accuracy')
+    dtrain = xgb.DMatrix(X, label=y_encoded)
+    cv_results = xgb.cv(
+        model.get_xgb_params(),
+        dtrain,
+        num_boost_round=model.n_estimators,
+        folds=list(cv.split(X, y_encoded)),
+        metrics='merror',
+        seed=42
+    )
+    cv_accuracy = 1 - cv_results['test-merror-mean'].iloc[-1]
+    cv_std = cv_results['test-merror-std'].iloc[-1]
     
     print(f"\n📊 Cross-Validation Results:")
-    print(f"   Accuracy: {cv_scores.mean():.3f} ± {cv_scores.std():.3f}")
-    print(f"   Individual folds: {[f'{s:.3f}' for s in cv_scores]}")
+    print(f"   Accuracy: {cv_accuracy:.3f} ± {cv_std:.3f}")
     
     # Train on full dataset
     print(f"\n🎯 Training on full dataset...")
@@ -0,0 +1,46 @@
+# src/common/derived_properties.py
+
+"""
+Graph properties precomputed at ingest for governance checks
+
+Stored by the ingest builders and filtered on by the SHACL validator;
+scripts/migrate_graph.py backfills older graphs. Kept free of heavy imports
+so ingest doesn't pull in the validator.
+"""
+
+import re
+from typing import Optional
+
+
+# Column-name fragments that mark a column as potential PII (PIIDetectionShape)
+PII_NAME_PATTERNS = ('email', 'phone', 'ssn', 'address', 'credit_card', 'password')
+_PII_NAME_RE = re.compile('|'.join(map(re.escape, PII_NAME_PATTERNS)), re.IGNORECASE)
+
+
+def is_pii_column_name(name: Optional[str]) -> Optional[bool]:
+    """One case-insensitive scan for any PII pattern; stored as c.pii_hint at ingest"""
+    if name is None:
+        return None
+    return _PII_NAME_RE.search(name) is not None
+
+
+# SIMILAR_TO.row_count_delta_ratio for (db:FederatedTable)-[r]->(sf:OlistData),
+# read by CrossPlatformConsistencyShape; -1 marks a ratio that can't be computed
+# (the shape compares the raw counts for those edges itself)
+ROW_COUNT_DELTA_RATIO = """CASE
+        WHEN db.row_count IS NOT NULL AND sf.row_count > 0
+        THEN abs(toFloat(db.row_count) - toFloat(sf.row_count)) / toFloat(sf.row_count)
+        ELSE -1.0
+    END"""
+
+# Appended to a statement that has just written t.row_count (t is an OlistData
+# or FederatedTable) so the ratio on t's cross-source edges stays current
+REFRESH_ROW_COUNT_DELTA_RATIO = """
+    CALL {
+        WITH t
+        MATCH (t)-[r:SIMILAR_TO]-()
+        WITH r, startNode(r) AS db, endNode(r) AS sf
+        WHERE db:FederatedTable AND sf:OlistData
+        SET r.row_count_delta_ratio = """ + ROW_COUNT_DELTA_RATIO + """
+    }
+"""
@@ -0,0 +1,22 @@
+# src/common/graph_version.py
+
+"""
+Cheap fingerprint of the Neo4j graph, for keying caches of query results
+
+Node/relationship totals come from the count store; the latest updated_at
+that ingest stamps on tables catches re-ingests that keep the totals.
+"""
+
+GRAPH_VERSION_QUERY = """
+    CALL { MATCH (n) RETURN count(n) AS nodes }
+    CALL { MATCH ()-[r]->() RETURN count(r) AS relationships }
+    CALL { MATCH (t:OlistData) RETURN max(t.updated_at) AS olist_updated }
+    CALL { MATCH (t:FederatedTable) RETURN max(t.updated_at) AS federated_updated }
+    RETURN nodes, relationships, olist_updated, federated_updated
+"""
+
+
+def graph_version(session) -> str:
+    """Changes on any re-ingest or added/removed node or edge"""
+    record = session.run(GRAPH_VERSION_QUERY).single()
+    return repr(tuple(record.values()))
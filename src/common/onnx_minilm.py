@@ -0,0 +1,68 @@
+# src/common/onnx_minilm.py
+
+"""
+int8 ONNX Runtime stand-in for the MiniLM SentenceTransformer
+
+Selected with EMBEDDINGS_BACKEND=onnx by the duplicate detector and the
+embeddings baseline; needs optimum[onnxruntime] (requirements-optional.txt).
+"""
+
+import os
+import numpy as np
+
+
+# Where the exported and quantized model is cached (NEXUS_ONNX_DIR overrides)
+DEFAULT_ONNX_DIR = '.nexus_onnx/all-MiniLM-L6-v2'
+
+
+class OnnxMiniLM:
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime with dynamic int8 quantization
+    
+    Implements the part of SentenceTransformer.encode NEXUS uses:
+    mean pooling over the attention mask, then L2 normalization. The exported
+    and quantized model is cached under cache_dir.
+    """
+    MODEL_ID = 'sentence-transformers/all-MiniLM-L6-v2'
+    MAX_SEQ_LENGTH = 256  # same as the sentence-transformers config
+    
+    def __init__(self, cache_dir: str):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+        
+        quantized_dir = os.path.join(cache_dir, 'int8')
+        if not os.path.isdir(quantized_dir):
+            model = ORTModelForFeatureExtraction.from_pretrained(self.MODEL_ID, export=True)
+            quantizer = ORTQuantizer.from_pretrained(model)
+            quantizer.quantize(
+                save_dir=quantized_dir,
+                quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+            )
+            AutoTokenizer.from_pretrained(self.MODEL_ID).save_pretrained(quantized_dir)
+        
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            quantized_dir, file_name='model_quantized.onnx', provider='CPUExecutionProvider'
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(quantized_dir)
+    
+    def encode(self, texts, batch_size: int = 64, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = True, show_progress_bar: bool = False) -> np.ndarray:
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size, convert_to_numpy, normalize_embeddings)[0]
+        
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size], padding=True, truncation=True,
+                max_length=self.MAX_SEQ_LENGTH, return_tensors='np'
+            )
+            hidden = self.model(**inputs).last_hidden_state
+            mask = inputs['attention_mask'][..., None].astype(np.float32)
+            batches.append((hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None))
+        
+        embeddings = np.concatenate(batches).astype(np.float32) if batches else np.empty((0, 384), np.float32)
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings
@@ -0,0 +1,58 @@
+# src/common/validation_indexes.py
+
+"""
+RANGE indexes behind the SHACL validator's filter predicates
+
+Created by the ingest builders for the labels / relationship types they
+write, so the validator itself only reads the graph.
+"""
+
+from typing import Iterable
+
+
+# (label or relationship type, properties, is_relationship) filtered by shapes,
+# or read for their latest value (updated_at)
+VALIDATION_INDEXES = [
+    ('OlistData', ('schema',), False),
+    ('OlistData', ('row_count',), False),
+    ('OlistData', ('qualified_name',), False),
+    ('OlistData', ('updated_at',), False),
+    ('FederatedTable', ('source',), False),
+    ('FederatedTable', ('owner',), False),
+    ('FederatedTable', ('full_name',), False),
+    ('FederatedTable', ('row_count',), False),
+    ('FederatedTable', ('updated_at',), False),
+    ('FederatedColumn', ('sensitivity',), False),
+    ('FederatedColumn', ('pii_hint',), False),
+    ('FederatedColumn', ('data_type',), False),
+    ('OLIST_DUPLICATE', ('match_type', 'confidence'), True),
+    ('OLIST_DUPLICATE', ('confidence',), True),
+    ('DERIVES_FROM', ('confidence',), True),
+    ('SIMILAR_TO', ('score',), True),
+    ('SIMILAR_TO', ('row_count_delta_ratio',), True),
+]
+
+
+def ensure_validation_indexes(driver, labels: Iterable[str]):
+    """Create the validation indexes on the given labels / types that are missing
+    
+    Existing indexes (including the ones backing constraints, e.g. the
+    unique FederatedTable.full_name) are read from SHOW INDEXES and skipped.
+    """
+    labels = set(labels)
+    with driver.session() as session:
+        existing = {
+            (record['labelsOrTypes'][0], tuple(record['properties']))
+            for record in session.run(
+                "SHOW INDEXES YIELD labelsOrTypes, properties "
+                "WHERE labelsOrTypes IS NOT NULL AND properties IS NOT NULL "
+                "RETURN labelsOrTypes, properties"
+            )
+        }
+        for label, properties, is_relationship in VALIDATION_INDEXES:
+            if label not in labels or (label, properties) in existing:
+                continue
+            var = 'r' if is_relationship else 'n'
+            pattern = f"()-[r:{label}]-()" if is_relationship else f"(n:{label})"
+            keys = ", ".join(f"{var}.{prop}" for prop in properties)
+            session.run(f"CREATE INDEX IF NOT EXISTS FOR {pattern} ON ({keys})").consume()
@@ -1,3 +1,5 @@
+import asyncio
+import json
 import snowflake.connector
 from snowflake.connector import DictCursor
 import os
@@ -6,6 +8,94 @@ import logging
 
 load_dotenv()
 
+# INFORMATION_SCHEMA.COLUMNS fields needed to rebuild a SHOW COLUMNS row
+INFO_SCHEMA_COLUMN_FIELDS = (
+    "TABLE_NAME, COLUMN_NAME, DATA_TYPE, IS_NULLABLE, ORDINAL_POSITION, "
+    "CHARACTER_MAXIMUM_LENGTH, CHARACTER_OCTET_LENGTH, "
+    "NUMERIC_PRECISION, NUMERIC_SCALE, DATETIME_PRECISION"
+)
+
+
+# Returns {schema: {table: {row_count, columns}}} for a whole database in one
+# call. Anonymous procedure: nothing is created in the account and no CREATE
+# PROCEDURE privilege is needed. Columns are raw INFORMATION_SCHEMA rows;
+# extract_catalog reshapes them with show_columns_entry like bulk_columns does.
+CATALOG_PROCEDURE_SQL = """
+WITH nexus_extract_catalog AS PROCEDURE (DB STRING)
+RETURNS VARIANT
+LANGUAGE JAVASCRIPT
+AS
+$$
+var catalog = {};
+var tables = snowflake.execute({
+    sqlText: "SELECT table_schema, table_name, row_count FROM IDENTIFIER(?) " +
+             "WHERE table_type = 'BASE TABLE' " +
+             "AND table_schema NOT IN ('INFORMATION_SCHEMA', 'PUBLIC') " +
+             "ORDER BY table_schema, table_name",
+    binds: [DB + ".INFORMATION_SCHEMA.TABLES"]
+});
+while (tables.next()) {
+    var schema = tables.getColumnValue(1);
+    catalog[schema] = catalog[schema] || {};
+    catalog[schema][tables.getColumnValue(2)] = {row_count: tables.getColumnValue(3), columns: []};
+}
+var columns = snowflake.execute({
+    sqlText: "SELECT TABLE_SCHEMA, """ + INFO_SCHEMA_COLUMN_FIELDS + """ " +
+             "FROM IDENTIFIER(?) ORDER BY table_schema, table_name, ordinal_position",
+    binds: [DB + ".INFORMATION_SCHEMA.COLUMNS"]
+});
+while (columns.next()) {
+    var schema = columns.getColumnValue(1);
+    var table = columns.getColumnValue(2);
+    if (catalog[schema] && catalog[schema][table]) {
+        var row = {};
+        for (var i = 2; i <= columns.getColumnCount(); i++) {
+            row[columns.getColumnName(i)] = columns.getColumnValue(i);
+        }
+        catalog[schema][table].columns.push(row);
+    }
+}
+return catalog;
+$$
+CALL nexus_extract_catalog(%s)
+"""
+
+
+def show_columns_entry(row):
+    """
+    SHOW COLUMNS-shaped column dict from an INFORMATION_SCHEMA.COLUMNS row
+    
+    Rebuilds SHOW COLUMNS' JSON data_type (with length / precision / scale,
+    e.g. {"type":"TEXT","length":50,...}) and its 'true'/'false' null?, so
+    table fingerprints match whichever path fetched the columns.
+    """
+    data_type = row['DATA_TYPE']
+    nullable = row['IS_NULLABLE'] == 'YES'
+    
+    if data_type == 'NUMBER':
+        spec = {'type': 'FIXED', 'precision': row['NUMERIC_PRECISION'], 'scale': row['NUMERIC_SCALE']}
+    elif data_type in ('TEXT', 'BINARY'):
+        spec = {'type': data_type, 'length': row['CHARACTER_MAXIMUM_LENGTH'],
+                'byteLength': row['CHARACTER_OCTET_LENGTH']}
+    elif data_type == 'FLOAT':
+        spec = {'type': 'REAL'}
+    elif data_type.startswith('TIMESTAMP') or data_type == 'TIME':
+        spec = {'type': data_type, 'precision': 0, 'scale': row['DATETIME_PRECISION']}
+    else:
+        spec = {'type': data_type}
+    spec['nullable'] = nullable
+    if data_type in ('TEXT', 'BINARY'):
+        spec['fixed'] = False
+    
+    return {
+        'table_name': row['TABLE_NAME'],
+        'column_name': row['COLUMN_NAME'],
+        'data_type': json.dumps(spec, separators=(',', ':')),
+        'null?': 'true' if nullable else 'false',
+        'ordinal_position': row['ORDINAL_POSITION'],
+    }
+
+
 class SnowflakeConnector:
     def __init__(self):
         self.connection = None
@@ -57,17 +147,116 @@ class SnowflakeConnector:
         cursor.execute(f"SHOW TABLES IN {database}.{schema}")
         return cursor.fetchall()
     
+    def bulk_columns(self, database, schema):
+        """Fetch columns of every table in a schema, grouped by table name"""
+        cursor = self.connection.cursor(DictCursor)
+        cursor.execute(
+            f"""SELECT {INFO_SCHEMA_COLUMN_FIELDS}
+                FROM {database}.INFORMATION_SCHEMA.COLUMNS
+                WHERE table_schema = %s
+                ORDER BY table_name, ordinal_position""",
+            (schema,)
+        )
+        columns_by_table = {}
+        for row in cursor:
+            columns_by_table.setdefault(row['TABLE_NAME'], []).append(show_columns_entry(row))
+        return columns_by_table
+    
+    def bulk_row_counts(self, database, schema):
+        """Fetch maintained row counts of every table in a schema (no table scans)"""
+        cursor = self.connection.cursor(DictCursor)
+        cursor.execute(
+            f"""SELECT table_name, row_count
+                FROM {database}.INFORMATION_SCHEMA.TABLES
+                WHERE table_schema = %s""",
+            (schema,)
+        )
+        return {
+            row['TABLE_NAME']: row['ROW_COUNT'] if row['ROW_COUNT'] is not None else -1
+            for row in cursor
+        }
+    
+    def get_sample_data(self, database, schema, table, limit=100):
+        """Fetch a small sample of rows as a pyarrow Table (None if empty or unavailable)"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(f"SELECT * FROM {database}.{schema}.{table} LIMIT {int(limit)}")
+            return cursor.fetch_arrow_all()
+        except Exception as e:
+            self.logger.warning(f"Could not get sample data for {table}: {e}")
+            return None
+    
+    async def fetch_async(self, sql, cursor_class=None, poll_interval=0.05):
+        """
+        Run a query without blocking the event loop
+        
+        Submits with execute_async and polls the query status, so many queries
+        can be in flight on one connection (each on its own cursor). Returns
+        the cursor, ready to fetch.
+        """
+        cursor = self.connection.cursor(cursor_class) if cursor_class else self.connection.cursor()
+        await asyncio.to_thread(cursor.execute_async, sql)
+        query_id = cursor.sfqid
+        
+        while True:
+            status = await asyncio.to_thread(self.connection.get_query_status_throw_if_error, query_id)
+            if not self.connection.is_still_running(status):
+                break
+            await asyncio.sleep(poll_interval)
+        
+        await asyncio.to_thread(cursor.get_results_from_sfqid, query_id)
+        return cursor
+    
+    async def get_sample_data_async(self, database, schema, table, limit=100):
+        """Async variant of get_sample_data"""
+        try:
+            cursor = await self.fetch_async(
+                f"SELECT * FROM {database}.{schema}.{table} LIMIT {int(limit)}"
+            )
+            return await asyncio.to_thread(cursor.fetch_arrow_all)
+        except Exception as e:
+            self.logger.warning(f"Could not get sample data for {table}: {e}")
+            return None
+    
+    def extract_catalog(self, database):
+        """Schemas, tables, columns and row counts of a database in one round-trip"""
+        cursor = self.connection.cursor()
+        cursor.execute(CATALOG_PROCEDURE_SQL, (database,))
+        catalog = json.loads(cursor.fetchone()[0])
+        
+        for tables in catalog.values():
+            for info in tables.values():
+                if info['row_count'] is None:
+                    info['row_count'] = -1
+                info['columns'] = [show_columns_entry(row) for row in info['columns']]
+        return catalog
+    
     def get_table_metadata(self, database, schema, table):
         """Get detailed table information"""
-        cursor = self.connection.cursor(DictCursor)
+        full_name = f"{database}.{schema}.{table}"
+        
+        # Submit columns, row count and sample together so the three
+        # round-trips overlap instead of running back to back
+        query_ids = {}
+        # The sample uses a plain cursor so it can be fetched as an Arrow table
+        for key, sql, cursor_class in (
+            ('columns', f"SHOW COLUMNS IN {full_name}", DictCursor),
+            ('row_count', f"SELECT COUNT(*) as row_count FROM {full_name}", DictCursor),
+            ('sample_data', f"SELECT * FROM {full_name} LIMIT 100", None),
+        ):
+            cursor = self.connection.cursor(cursor_class) if cursor_class else self.connection.cursor()
+            cursor.execute_async(sql)
+            query_ids[key] = (cursor, cursor.sfqid)
         
         # Get columns
-        cursor.execute(f"SHOW COLUMNS IN {database}.{schema}.{table}")
+        cursor, qid = query_ids['columns']
+        cursor.get_results_from_sfqid(qid)
         columns = cursor.fetchall()
         
         # Get row count
         try:
-            cursor.execute(f"SELECT COUNT(*) as row_count FROM {database}.{schema}.{table}")
+            cursor, qid = query_ids['row_count']
+            cursor.get_results_from_sfqid(qid)
             row_count = cursor.fetchone()['ROW_COUNT']
         except Exception as e:
             self.logger.warning(f"Could not get row count for {table}: {e}")
@@ -75,11 +264,12 @@ class SnowflakeConnector:
         
         # Get sample data
         try:
-            cursor.execute(f"SELECT * FROM {database}.{schema}.{table} LIMIT 100")
-            sample_data = cursor.fetchall()
+            cursor, qid = query_ids['sample_data']
+            cursor.get_results_from_sfqid(qid)
+            sample_data = cursor.fetch_arrow_all()
         except Exception as e:
             self.logger.warning(f"Could not get sample data for {table}: {e}")
-            sample_data = []
+            sample_data = None
         
         return {
             'columns': columns,
@@ -1,88 +1,171 @@
 from connectors.snowflake_connector import SnowflakeConnector
-import hashlib
+import asyncio
 import json
 import logging
 
+import pyarrow.compute as pc
+import xxhash
+
 class SnowflakeMetadataExtractor:
+    # Per-table queries kept in flight at once on the warehouse
+    MAX_CONCURRENCY = 16
+    
     def __init__(self):
         self.connector = SnowflakeConnector()
         self.metadata_catalog = {}
         self.logger = logging.getLogger(__name__)
         
-    def extract_all_metadata(self):
+    def extract_all_metadata(self, max_concurrency=MAX_CONCURRENCY):
         """Main extraction pipeline"""
         self.connector.connect()
         
         try:
-            # Get all databases
-            databases = self.connector.get_databases()
+            return asyncio.run(self._crawl(max_concurrency))
+        finally:
+            self.connector.close()
+    
+    async def _crawl(self, max_concurrency):
+        """
+        Walk databases -> schemas on the event loop
+        
+        Schemas, tables, columns and row counts of a database come from one
+        call to the catalog procedure; if it can't be used the schemas are
+        walked instead. Each schema's tables are extracted in a background
+        task as soon as the schema is known, and a semaphore bounds queries
+        in flight.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        schema_tasks = []
+        
+        # Get all databases
+        databases = await asyncio.to_thread(self.connector.get_databases)
+        # Cleared after the first failure so later databases go straight to walking
+        procedure_ready = True
+        
+        # Filter to only databases we have access to
+        accessible_databases = ['TRAINING_DB', 'SNOWFLAKE_SAMPLE_DATA']
+        
+        for db in databases:
+            db_name = db['name']
+            
+            # Skip system databases and ones we can't access
+            if db_name.startswith('SNOWFLAKE') and db_name != 'SNOWFLAKE_SAMPLE_DATA':
+                self.logger.info(f"Skipping system database: {db_name}")
+                continue
+                
+            if db_name not in accessible_databases:
+                self.logger.info(f"Skipping restricted database: {db_name}")
+                continue
             
-            # Filter to only databases we have access to
-            accessible_databases = ['TRAINING_DB', 'SNOWFLAKE_SAMPLE_DATA']
+            self.logger.info(f"Processing database: {db_name}")
+            self.metadata_catalog[db_name] = {}
             
-            for db in databases:
-                db_name = db['name']
+            catalog = None
+            if procedure_ready:
+                try:
+                    catalog = await asyncio.to_thread(self.connector.extract_catalog, db_name)
+                except Exception as e:
+                    procedure_ready = False
+                    self.logger.warning(f"  Catalog procedure failed for {db_name}, walking schemas: {e}")
+            
+            if catalog is not None:
+                for schema_name, tables in catalog.items():
+                    self.logger.info(f"  Processing schema: {db_name}.{schema_name}")
+                    self.metadata_catalog[db_name][schema_name] = {}
+                    schema_tasks.append(asyncio.create_task(self._extract_schema_async(
+                        semaphore, db_name, schema_name, list(tables),
+                        {name: info['columns'] for name, info in tables.items()},
+                        {name: info['row_count'] for name, info in tables.items()}
+                    )))
+                continue
+            
+            try:
+                # Get schemas in database
+                schemas = await asyncio.to_thread(self.connector.get_schemas, db_name)
                 
-                # Skip system databases and ones we can't access
-                if db_name.startswith('SNOWFLAKE') and db_name != 'SNOWFLAKE_SAMPLE_DATA':
-                    self.logger.info(f"Skipping system database: {db_name}")
-                    continue
+                for schema in schemas:
+                    schema_name = schema['name']
                     
-                if db_name not in accessible_databases:
-                    self.logger.info(f"Skipping restricted database: {db_name}")
-                    continue
-                
-                self.logger.info(f"Processing database: {db_name}")
-                self.metadata_catalog[db_name] = {}
-                
-                try:
-                    # Get schemas in database
-                    schemas = self.connector.get_schemas(db_name)
+                    # Skip system schemas
+                    if schema_name in ['INFORMATION_SCHEMA', 'PUBLIC']:
+                        continue
                     
-                    for schema in schemas:
-                        schema_name = schema['name']
-                        
-                        # Skip system schemas
-                        if schema_name in ['INFORMATION_SCHEMA', 'PUBLIC']:
-                            continue
+                    self.logger.info(f"  Processing schema: {db_name}.{schema_name}")
+                    self.metadata_catalog[db_name][schema_name] = {}
+                    
+                    try:
+                        # Get tables in schema
+                        tables = await asyncio.to_thread(self.connector.get_tables, db_name, schema_name)
                         
-                        self.logger.info(f"  Processing schema: {db_name}.{schema_name}")
-                        self.metadata_catalog[db_name][schema_name] = {}
+                        # Columns and row counts for the whole schema in two queries
+                        columns_by_table = await asyncio.to_thread(
+                            self.connector.bulk_columns, db_name, schema_name
+                        )
+                        row_counts = await asyncio.to_thread(
+                            self.connector.bulk_row_counts, db_name, schema_name
+                        )
                         
-                        try:
-                            # Get tables in schema
-                            tables = self.connector.get_tables(db_name, schema_name)
-                            
-                            for table in tables:
-                                table_name = table['name']
-                                self.logger.info(f"    Extracting metadata for: {table_name}")
-                                
-                                # Extract comprehensive metadata
-                                table_metadata = self.extract_table_metadata(
-                                    db_name, schema_name, table_name
-                                )
-                                
-                                self.metadata_catalog[db_name][schema_name][table_name] = table_metadata
+                        schema_tasks.append(asyncio.create_task(self._extract_schema_async(
+                            semaphore, db_name, schema_name,
+                            [table['name'] for table in tables], columns_by_table, row_counts
+                        )))
+                    
+                    except Exception as e:
+                        self.logger.warning(f"    Could not access tables in {db_name}.{schema_name}: {e}")
+                        continue
                         
-                        except Exception as e:
-                            self.logger.warning(f"    Could not access tables in {db_name}.{schema_name}: {e}")
-                            continue
-                            
-                except Exception as e:
-                    self.logger.warning(f"  Could not access schemas in {db_name}: {e}")
-                    continue
-            
-            return self.metadata_catalog
-            
-        finally:
-            self.connector.close()
+            except Exception as e:
+                self.logger.warning(f"  Could not access schemas in {db_name}: {e}")
+                continue
+        
+        await asyncio.gather(*schema_tasks)
+        return self.metadata_catalog
+    
+    async def _extract_schema_async(self, semaphore, database, schema, table_names,
+                                    columns_by_table, row_counts):
+        """Extract every table of one schema concurrently"""
+        results = await asyncio.gather(*(
+            self._extract_table_async(
+                semaphore, database, schema, table_name,
+                columns_by_table.get(table_name, []), row_counts.get(table_name, -1)
+            )
+            for table_name in table_names
+        ))
+        
+        # Assign in listing order so the catalog layout is deterministic
+        for table_name, table_metadata in zip(table_names, results):
+            self.metadata_catalog[database][schema][table_name] = table_metadata
+    
+    async def _extract_table_async(self, semaphore, database, schema, table, columns, row_count):
+        """Fetch the sample asynchronously, then assemble the table metadata"""
+        async with semaphore:
+            self.logger.info(f"    Extracting metadata for: {table}")
+            try:
+                sample_data = await self.connector.get_sample_data_async(database, schema, table)
+            except Exception as e:
+                self.logger.error(f"Error extracting metadata for {database}.{schema}.{table}: {e}")
+                return None
+        
+        return self._assemble_table_metadata(database, schema, table, {
+            'columns': columns,
+            'row_count': row_count,
+            'sample_data': sample_data
+        })
     
     def extract_table_metadata(self, database, schema, table):
         """Extract detailed metadata for a single table"""
         try:
             # Get basic metadata
             metadata = self.connector.get_table_metadata(database, schema, table)
-            
+        except Exception as e:
+            self.logger.error(f"Error extracting metadata for {database}.{schema}.{table}: {e}")
+            return None
+        
+        return self._assemble_table_metadata(database, schema, table, metadata)
+    
+    def _assemble_table_metadata(self, database, schema, table, metadata):
+        """Fingerprint, lineage, access history and profile for fetched metadata"""
+        try:
             # Create table fingerprint for duplicate detection
             fingerprint = self.create_table_fingerprint(metadata)
             
@@ -118,16 +201,16 @@ class SnowflakeMetadataExtractor:
         """Create a unique fingerprint for duplicate detection"""
         
         # Create signature based on column names and types
-        column_signature = []
-        for col in metadata['columns']:
-            column_name = col.get('column_name', col.get('COLUMN_NAME', ''))
-            data_type = col.get('data_type', col.get('DATA_TYPE', ''))
-            column_signature.append(f"{column_name}:{data_type}")
+        column_signature = sorted(
+            (col.get('column_name', col.get('COLUMN_NAME', '')),
+             col.get('data_type', col.get('DATA_TYPE', '')))
+            for col in metadata['columns']
+        )
         
-        signature_string = '|'.join(sorted(column_signature))
+        signature_string = '|'.join(f"{name}:{dtype}" for name, dtype in column_signature)
         
-        # Create hash
-        fingerprint = hashlib.md5(signature_string.encode()).hexdigest()
+        # Non-cryptographic hash - only used to compare tables with each other
+        fingerprint = xxhash.xxh3_128_hexdigest(signature_string.encode())
         
         return {
             'column_signature': fingerprint,
@@ -136,11 +219,20 @@ class SnowflakeMetadataExtractor:
         }
     
     def profile_data(self, sample_data):
-        """Basic profiling of data patterns"""
-        if not sample_data:
+        """Columnar profiling of the sample (pyarrow Table) with Arrow compute kernels"""
+        if sample_data is None or sample_data.num_rows == 0:
             return {}
         
+        num_rows = sample_data.num_rows
         return {
-            'sample_size': len(sample_data),
-            'has_data': len(sample_data) > 0
+            'sample_size': num_rows,
+            'has_data': True,
+            'null_ratio': {
+                name: sample_data.column(name).null_count / num_rows
+                for name in sample_data.column_names
+            },
+            'approx_unique': {
+                name: pc.count_distinct(sample_data.column(name)).as_py()
+                for name in sample_data.column_names
+            }
         }
\ No newline at end of file
@@ -11,17 +11,88 @@ File: src/federation/cross_source_duplicate_detector.py
 
 import os
 import json
+import hashlib
+import queue
+import threading
 import numpy as np
 from typing import Dict, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from itertools import chain, groupby
+from operator import itemgetter
 from neo4j import GraphDatabase
+from neo4j.exceptions import ClientError
 from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 
+# Project root, so the module also runs as a script
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.common.derived_properties import ROW_COUNT_DELTA_RATIO
+from src.common.onnx_minilm import OnnxMiniLM, DEFAULT_ONNX_DIR
+from src.common.validation_indexes import ensure_validation_indexes
+
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
 load_dotenv()
 
 
-@dataclass
+def _configure_torch_threads():
+    """Let MiniLM use every core for intra-op work (NEXUS_TORCH_THREADS overrides)"""
+    import torch
+    torch.set_num_threads(int(os.getenv('NEXUS_TORCH_THREADS', os.cpu_count() or 4)))
+    try:
+        torch.set_num_interop_threads(2)
+    except RuntimeError:
+        # Only settable before the first parallel op; keep torch's default then
+        pass
+
+
+# Marks the end of the record stream in CrossSourceDuplicateDetector._load_signatures
+_END_OF_STREAM = object()
+
+
+def _quantize(vectors: np.ndarray) -> np.ndarray:
+    """int8-quantize unit-norm embeddings (components lie in [-1, 1])"""
+    return np.clip(np.round(vectors * 127), -127, 127).astype(np.int8)
+
+
+def _pairwise_cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(n, m) cosine similarities between rows of a and b
+    
+    Rows are either float32 unit vectors or int8-quantized embeddings; all-zero
+    rows (missing embeddings) score 0 against everything. Uses SimSIMD's SIMD
+    cdist when installed (int8 kernels use VNNI), otherwise a BLAS matmul.
+    """
+    if simsimd is not None:
+        if a.dtype != np.int8:
+            a, b = a.astype(np.float32), b.astype(np.float32)
+        a, b = np.ascontiguousarray(a), np.ascontiguousarray(b)
+        sims = 1.0 - np.asarray(simsimd.cdist(a, b, metric='cosine'), dtype=np.float32)
+        sims[~a.any(axis=1), :] = 0.0
+        sims[:, ~b.any(axis=1)] = 0.0
+        return sims
+    
+    if a.dtype == np.int8:
+        # Sums of int8 products over d <= 1024 are exact in float32
+        a, b = a.astype(np.float32), b.astype(np.float32)
+        dots = a @ b.T
+        denom = np.outer(np.linalg.norm(a, axis=1), np.linalg.norm(b, axis=1))
+        return np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+    
+    return a @ b.T
+
+
+@dataclass(slots=True)
 class TableSignature:
     """Represents a table's semantic signature for SANTOS matching"""
     table_id: str
@@ -30,13 +101,19 @@ class TableSignature:
     name: str
     row_count: int
     column_count: int
-    columns: List[Dict]  # [{name, type, ordinal}]
-    column_embedding: Optional[np.ndarray] = None
-    type_signature: str = ""
-    name_signature: str = ""
+    # Columns as parallel arrays (struct-of-arrays), one entry per named column
+    col_names: List[str]
+    col_type_ids: np.ndarray  # uint16 ids into CrossSourceDuplicateDetector._type_names
+    col_ordinals: np.ndarray  # int32, -1 where unknown
+    column_embedding: Optional[np.ndarray] = None  # int8-quantized, see _quantize
+    type_mask: int = 0  # bit i set for type id i, see _compute_type_signature
+    name_set: frozenset = frozenset()  # see _compute_name_signature
+    fk_pattern: frozenset = frozenset()  # entities of *_id / *_key columns
+    # Stacked L2-normalized column-name embeddings, rows aligned with col_names
+    column_name_matrix: Optional[np.ndarray] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class SimilarityScore:
     """SANTOS-style similarity breakdown"""
     source_table: str
@@ -73,6 +150,9 @@ class CrossSourceDuplicateDetector:
     MEDIUM_CONFIDENCE_THRESHOLD = 0.50
     MIN_SIMILARITY_THRESHOLD = 0.30
     
+    ENCODE_BATCH_SIZE = 64
+    STREAM_QUEUE_SIZE = 256
+    
     def __init__(self, neo4j_uri: str = "bolt://localhost:7687",
                  neo4j_user: str = "neo4j",
                  neo4j_password: str = None):
@@ -81,12 +161,89 @@ class CrossSourceDuplicateDetector:
             neo4j_uri, 
             auth=(neo4j_user, self.neo4j_password)
         )
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedding_model = self._load_embedding_model()
+        self._emb_cache = self._open_embedding_cache()
         self.snowflake_tables: Dict[str, TableSignature] = {}
         self.databricks_tables: Dict[str, TableSignature] = {}
+        self._name_emb_cache: Dict[str, np.ndarray] = {}
+        self._type_ids: Dict[str, int] = {}
+        self._type_names: List[str] = []
         
     def close(self):
         self.driver.close()
+        if self._emb_cache is not None:
+            self._emb_cache.close()
+    
+    def _load_embedding_model(self):
+        """
+        MiniLM on PyTorch, or int8 ONNX Runtime with EMBEDDINGS_BACKEND=onnx
+        
+        The ONNX path needs optimum[onnxruntime]; if it can't be loaded the
+        PyTorch model is used.
+        """
+        if os.getenv('EMBEDDINGS_BACKEND', 'torch').lower() == 'onnx':
+            try:
+                return OnnxMiniLM(os.getenv('NEXUS_ONNX_DIR', DEFAULT_ONNX_DIR))
+            except (ImportError, OSError, ValueError, RuntimeError) as e:
+                print(f"⚠️  ONNX backend unavailable ({e}), falling back to PyTorch")
+        # Done here rather than at import so importing the module leaves
+        # torch's process-wide thread settings alone
+        _configure_torch_threads()
+        return SentenceTransformer('all-MiniLM-L6-v2')
+    
+    def _open_embedding_cache(self):
+        """On-disk text -> embedding cache shared across runs
+        
+        Needs diskcache; NEXUS_EMB_CACHE sets the directory, and an empty
+        value turns the cache off.
+        """
+        cache_dir = os.getenv('NEXUS_EMB_CACHE', '.nexus_emb_cache')
+        if diskcache is None or not cache_dir:
+            return None
+        return diskcache.Cache(cache_dir)
+    
+    def _embedding_cache_key(self, text: str) -> str:
+        # Backends embed slightly differently, so they don't share entries
+        model = type(self.embedding_model).__name__
+        return hashlib.blake2b(f"{model}\0{text}".encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, encoding only those missing from the on-disk cache
+        
+        Cached embeddings are float16, so with the cache on every row goes
+        through float16; results are the same on a cold and a warm run.
+        """
+        if self._emb_cache is None:
+            return self._encode_batch(texts)
+        
+        keys = [self._embedding_cache_key(text) for text in texts]
+        embeddings = [self._emb_cache.get(key) for key in keys]
+        misses = [i for i, emb in enumerate(embeddings) if emb is None]
+        if misses:
+            fresh = self._encode_batch([texts[i] for i in misses]).astype(np.float16)
+            for i, emb in zip(misses, fresh):
+                self._emb_cache.set(keys[i], emb)
+                embeddings[i] = emb
+        return np.stack(embeddings).astype(np.float32)
+    
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed many texts in one batched model call (rows are L2-normalized)
+        
+        Texts are length-sorted first so each mini-batch pads to similar
+        lengths (the ONNX encoder doesn't sort on its own), then the rows are
+        scattered back to input order.
+        """
+        order = np.argsort([len(t) for t in texts], kind='stable')
+        embeddings = self.embedding_model.encode(
+            [texts[i] for i in order],
+            batch_size=self.ENCODE_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        out = np.empty_like(embeddings)
+        out[order] = embeddings
+        return out
     
     def _parse_snowflake_type(self, type_str: str) -> str:
         """Parse Snowflake JSON data_type to simple type name"""
@@ -104,160 +261,292 @@ class CrossSourceDuplicateDetector:
     # PHASE A: Building Signatures (SANTOS Pre-processing)
     # =========================================================================
     
-    def extract_snowflake_signatures(self) -> Dict[str, TableSignature]:
-        """Extract table signatures from OlistData nodes"""
-        query = """
+    # Both branches return the same columns so they can be combined with UNION ALL.
+    # One row per column (unaggregated, so the server never builds per-table
+    # lists); rows of a table are contiguous and regrouped on (src, tid).
+    # _build_signature unpacks rows by position, so keep the RETURN order.
+    _SNOWFLAKE_SIGNATURE_QUERY = """
         MATCH (t:OlistData)
         OPTIONAL MATCH (t)-[:HAS_COLUMN]->(c:OlistColumn)
-        WITH t, collect({
-            name: c.name,
-            type: c.data_type,
-            ordinal: c.ordinal_position
-        }) as columns
-        RETURN t.name as name,
+        RETURN 'snowflake' as src,
+               elementId(t) as tid,
+               t.name as name,
                t.schema as schema,
+               null as full_name,
                t.row_count as row_count,
                t.column_count as column_count,
-               columns
-        ORDER BY t.schema, t.name
-        """
-        
-        with self.driver.session() as session:
-            results = session.run(query)
-            for record in results:
-                table_id = f"{record['schema']}.{record['name']}".lower()
-                
-                # Parse columns and extract type from JSON
-                columns = []
-                for c in record['columns']:
-                    if c['name']:
-                        columns.append({
-                            'name': c['name'],
-                            'type': self._parse_snowflake_type(c['type']),
-                            'ordinal': c['ordinal']
-                        })
-                
-                sig = TableSignature(
-                    table_id=table_id,
-                    source='snowflake',
-                    schema=record['schema'],
-                    name=record['name'],
-                    row_count=record['row_count'] or 0,
-                    column_count=record['column_count'] or len(columns),
-                    columns=columns,
-                    type_signature=self._compute_type_signature(columns),
-                    name_signature=self._compute_name_signature(columns)
-                )
-                
-                col_text = " ".join([c['name'] for c in columns])
-                if col_text.strip():
-                    sig.column_embedding = self.embedding_model.encode(col_text)
-                else:
-                    sig.column_embedding = None
-                
-                self.snowflake_tables[table_id] = sig
-                
-        print(f"✅ Extracted {len(self.snowflake_tables)} Snowflake signatures")
-        for table_id, sig in list(self.snowflake_tables.items())[:3]:
-            print(f"   DEBUG: {table_id} -> {len(sig.columns)} columns: {[c['name'] for c in sig.columns[:3]]}")
-        return self.snowflake_tables
+               c.name as col_name,
+               c.data_type as col_type,
+               c.ordinal_position as col_ordinal
+        ORDER BY t.schema, t.name, tid
+    """
     
-    def extract_databricks_signatures(self) -> Dict[str, TableSignature]:
-        """Extract table signatures from FederatedTable nodes"""
-        query = """
+    _DATABRICKS_SIGNATURE_QUERY = """
         MATCH (t:FederatedTable)
         WHERE t.source = 'databricks'
         OPTIONAL MATCH (t)-[:HAS_COLUMN]->(c:FederatedColumn)
-        WITH t, collect({
-            name: c.name,
-            type: replace(coalesce(c.data_type, 'UNKNOWN'), 'ColumnTypeName.', ''),
-            ordinal: c.position
-        }) as columns
-        ORDER BY t.full_name
-        RETURN t.full_name as full_name,
-               t.column_count as column_count,
+        RETURN 'databricks' as src,
+               elementId(t) as tid,
+               null as name,
+               null as schema,
+               t.full_name as full_name,
                t.row_count as row_count,
-               columns
+               t.column_count as column_count,
+               c.name as col_name,
+               replace(coalesce(c.data_type, 'UNKNOWN'), 'ColumnTypeName.', '') as col_type,
+               c.position as col_ordinal
+        ORDER BY t.full_name, tid
+    """
+    
+    # Bolt records pulled per round trip while streaming signature rows
+    SIGNATURE_FETCH_SIZE = 1000
+    
+    def extract_snowflake_signatures(self) -> Dict[str, TableSignature]:
+        """Extract table signatures from OlistData nodes"""
+        self._load_signatures(self._SNOWFLAKE_SIGNATURE_QUERY)
+        self._report_snowflake_signatures()
+        return self.snowflake_tables
+    
+    def extract_databricks_signatures(self) -> Dict[str, TableSignature]:
+        """Extract table signatures from FederatedTable nodes"""
+        self._load_signatures(self._DATABRICKS_SIGNATURE_QUERY)
+        self._report_databricks_signatures()
+        return self.databricks_tables
+    
+    def extract_all_signatures(self):
+        """Extract both sources with one UNION ALL query and one encode batch"""
+        self._load_signatures(
+            self._SNOWFLAKE_SIGNATURE_QUERY + " UNION ALL " + self._DATABRICKS_SIGNATURE_QUERY
+        )
+        self._report_snowflake_signatures()
+        self._report_databricks_signatures()
+        return self.snowflake_tables, self.databricks_tables
+    
+    def _load_signatures(self, query: str):
+        """Build signatures from a signature query, dispatching on its src column
+        
+        A worker thread streams column rows from Neo4j into a bounded queue
+        while this thread regroups them per table, builds signatures and
+        encodes every ENCODE_BATCH_SIZE pending texts, so Bolt I/O overlaps
+        with model inference.
         """
+        pending = []  # (tables, table_id, col_text) awaiting an encode batch
+        records = queue.Queue(maxsize=self.STREAM_QUEUE_SIZE)
+        stop = threading.Event()
         
-        with self.driver.session() as session:
-            results = session.run(query)
-            for record in results:
-                table_id = record['full_name']
-                columns = [c for c in record['columns'] if c['name']]
-                
-                sig = TableSignature(
-                    table_id=table_id,
-                    source='databricks',
-                    schema='workspace.sample_data',
-                    name=table_id.split('.')[-1] if '.' in table_id else table_id,
-                    row_count=record['row_count'] or 0,
-                    column_count=record['column_count'] or len(columns),
-                    columns=columns,
-                    type_signature=self._compute_type_signature(columns),
-                    name_signature=self._compute_name_signature(columns)
-                )
-                
-                col_text = " ".join([c['name'] for c in columns])
-                sig.column_embedding = self.embedding_model.encode(col_text)
-                
-                self.databricks_tables[table_id] = sig
-                
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='nexus-neo4j') as pool:
+            producer = pool.submit(self._stream_records, query, records, stop)
+            try:
+                stream = iter(records.get, _END_OF_STREAM)
+                for _, rows in groupby(stream, key=itemgetter(0, 1)):  # (src, tid)
+                    entry = self._build_signature(list(rows))
+                    if entry is not None:
+                        pending.append(entry)
+                    if len(pending) >= self.ENCODE_BATCH_SIZE:
+                        self._embed_pending(pending)
+                        pending = []
+            finally:
+                stop.set()
+            producer.result()  # re-raise Neo4j errors from the worker
+        
+        if pending:
+            self._embed_pending(pending)
+    
+    def _stream_records(self, query: str, records: queue.Queue, stop: threading.Event):
+        """Producer: run the query and hand records over until told to stop"""
+        def offer(item) -> bool:
+            while not stop.is_set():
+                try:
+                    records.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        try:
+            with self.driver.session(fetch_size=self.SIGNATURE_FETCH_SIZE) as session:
+                for record in session.run(query):
+                    if not offer(record):
+                        return
+        finally:
+            offer(_END_OF_STREAM)
+    
+    def _build_signature(self, rows: List) -> Optional[Tuple[Dict, str, str]]:
+        """Store the TableSignature for one table's column rows; returns its
+        (tables, table_id, col_text) when it needs a column embedding"""
+        # Records are tuples in RETURN order; unpacking skips per-key lookups
+        src, _, name, schema, full_name, row_count, column_count, *_ = rows[0]
+        columns = [
+            (col_name, col_type, col_ordinal)
+            for *_, col_name, col_type, col_ordinal in rows
+            if col_name
+        ]
+        if src == 'snowflake':
+            table_id = f"{schema}.{name}".lower()
+            # Snowflake stores data_type as JSON
+            raw_types = [self._parse_snowflake_type(col_type) for _, col_type, _ in columns]
+            tables = self.snowflake_tables
+        else:
+            table_id = full_name
+            raw_types = [col_type or 'UNKNOWN' for _, col_type, _ in columns]
+            schema = 'workspace.sample_data'
+            name = table_id.split('.')[-1] if '.' in table_id else table_id
+            tables = self.databricks_tables
+        
+        col_names = [col_name for col_name, _, _ in columns]
+        col_type_ids = np.fromiter(
+            (self._type_id(self._normalize_type(t)) for t in raw_types),
+            dtype=np.uint16, count=len(raw_types)
+        )
+        col_ordinals = np.fromiter(
+            (-1 if ordinal is None else ordinal for _, _, ordinal in columns),
+            dtype=np.int32, count=len(columns)
+        )
+        
+        tables[table_id] = TableSignature(
+            table_id=table_id,
+            source=src,
+            schema=schema,
+            name=name,
+            row_count=row_count or 0,
+            column_count=column_count or len(columns),
+            col_names=col_names,
+            col_type_ids=col_type_ids,
+            col_ordinals=col_ordinals,
+            type_mask=self._compute_type_signature(col_type_ids),
+            name_set=self._compute_name_signature(col_names),
+            fk_pattern=self._compute_fk_pattern(col_names)
+        )
+        
+        # Snowflake tables without column names get no embedding
+        col_text = " ".join(col_names)
+        if src == 'databricks' or col_text.strip():
+            return tables, table_id, col_text
+        return None
+    
+    def _embed_pending(self, pending: List[Tuple[Dict, str, str]]):
+        """Encode and attach column embeddings for a batch of signatures"""
+        embeddings = _quantize(self._encode_texts([text for _, _, text in pending]))
+        for (tables, table_id, _), embedding in zip(pending, embeddings):
+            tables[table_id].column_embedding = embedding
+    
+    def _report_snowflake_signatures(self):
+        print(f"✅ Extracted {len(self.snowflake_tables)} Snowflake signatures")
+        for table_id, sig in list(self.snowflake_tables.items())[:3]:
+            print(f"   DEBUG: {table_id} -> {len(sig.col_names)} columns: {sig.col_names[:3]}")
+    
+    def _report_databricks_signatures(self):
         print(f"✅ Extracted {len(self.databricks_tables)} Databricks signatures")
         for table_id, sig in self.databricks_tables.items():
-            print(f"   DEBUG: {table_id} -> {len(sig.columns)} columns: {[c['name'] for c in sig.columns[:5]]}")
-        return self.databricks_tables
+            print(f"   DEBUG: {table_id} -> {len(sig.col_names)} columns: {sig.col_names[:5]}")
+    
+    # Cross-platform type normalization, shared by every signature
+    _TYPE_MAP = {
+        'TEXT': 'STRING', 'VARCHAR': 'STRING', 'CHAR': 'STRING', 
+        'STRING': 'STRING', 'NVARCHAR': 'STRING',
+        'NUMBER': 'NUMERIC', 'INT': 'NUMERIC', 'INTEGER': 'NUMERIC',
+        'FLOAT': 'NUMERIC', 'DOUBLE': 'NUMERIC', 'DECIMAL': 'NUMERIC',
+        'BIGINT': 'NUMERIC', 'SMALLINT': 'NUMERIC', 'LONG': 'NUMERIC',
+        'DATE': 'DATETIME', 'TIMESTAMP': 'DATETIME', 'DATETIME': 'DATETIME',
+        'TIMESTAMP_NTZ': 'DATETIME', 'TIMESTAMP_LTZ': 'DATETIME',
+        'BOOLEAN': 'BOOLEAN', 'BOOL': 'BOOLEAN',
+    }
     
-    def _compute_type_signature(self, columns: List[Dict]) -> str:
-        """Create sorted type signature with cross-platform normalization"""
-        type_map = {
-            'TEXT': 'STRING', 'VARCHAR': 'STRING', 'CHAR': 'STRING', 
-            'STRING': 'STRING', 'NVARCHAR': 'STRING',
-            'NUMBER': 'NUMERIC', 'INT': 'NUMERIC', 'INTEGER': 'NUMERIC',
-            'FLOAT': 'NUMERIC', 'DOUBLE': 'NUMERIC', 'DECIMAL': 'NUMERIC',
-            'BIGINT': 'NUMERIC', 'SMALLINT': 'NUMERIC', 'LONG': 'NUMERIC',
-            'DATE': 'DATETIME', 'TIMESTAMP': 'DATETIME', 'DATETIME': 'DATETIME',
-            'TIMESTAMP_NTZ': 'DATETIME', 'TIMESTAMP_LTZ': 'DATETIME',
-            'BOOLEAN': 'BOOLEAN', 'BOOL': 'BOOLEAN',
-        }
-        
-        types = []
-        for c in columns:
-            raw_type = c.get('type', 'UNKNOWN').upper()
-            normalized = type_map.get(raw_type, raw_type)
-            types.append(normalized)
-        
-        return ",".join(sorted(types))
-    
-    def _compute_name_signature(self, columns: List[Dict]) -> str:
-        """Create sorted name signature (normalized)"""
-        names = sorted([c.get('name', '').lower().replace('_', '') for c in columns])
-        return ",".join(names)
+    def _normalize_type(self, raw_type: str) -> str:
+        """Cross-platform type normalization"""
+        raw_type = raw_type.upper()
+        return self._TYPE_MAP.get(raw_type, raw_type)
+    
+    def _type_id(self, type_name: str) -> int:
+        """Small integer id for a normalized type, assigned on first sight"""
+        type_id = self._type_ids.get(type_name)
+        if type_id is None:
+            type_id = self._type_ids[type_name] = len(self._type_names)
+            self._type_names.append(type_name)
+        return type_id
+    
+    def _compute_type_signature(self, col_type_ids: np.ndarray) -> int:
+        """Type signature as a bitmask over the table's distinct type ids"""
+        if not len(col_type_ids):
+            # Column-less tables keep the lone '' type the old comma-joined
+            # signature split into, so they still match each other
+            return 1 << self._type_id('')
+        mask = 0
+        for type_id in np.unique(col_type_ids):
+            mask |= 1 << int(type_id)
+        return mask
+    
+    def _compute_name_signature(self, col_names: List[str]) -> frozenset:
+        """Name signature as a set of normalized column names"""
+        return frozenset([name.lower().replace('_', '') for name in col_names] or [''])
+    
+    def _compute_fk_pattern(self, col_names: List[str]) -> frozenset:
+        """Entities referenced by FK-looking columns (customer_id -> customer)"""
+        return frozenset(
+            name.rsplit('_', 1)[0]
+            for name in (n.lower() for n in col_names)
+            if name.endswith(('_id', '_key'))
+        )
+    
+    def _precompute_column_name_embeddings(self):
+        """Embed every distinct column name across both sources in one batch"""
+        names = sorted({
+            name
+            for sig in chain(self.snowflake_tables.values(), self.databricks_tables.values())
+            for name in sig.col_names
+            if name not in self._name_emb_cache
+        })
+        if names:
+            self._name_emb_cache.update(zip(names, self._encode_texts(names)))
+        
+        for sig in chain(self.snowflake_tables.values(), self.databricks_tables.values()):
+            self._column_name_matrix(sig)
+    
+    def _column_name_matrix(self, sig: TableSignature) -> np.ndarray:
+        """Build (once) the (C, d) matrix of a table's column-name embeddings"""
+        if sig.column_name_matrix is None:
+            if sig.col_names:
+                sig.column_name_matrix = np.stack(
+                    [self._name_embedding(name) for name in sig.col_names]
+                )
+            else:
+                sig.column_name_matrix = np.empty((0, 0), dtype=np.float32)
+        return sig.column_name_matrix
+    
+    def _name_embedding(self, name: str) -> np.ndarray:
+        """Cached column-name embedding (encodes on a miss)"""
+        emb = self._name_emb_cache.get(name)
+        if emb is None:
+            emb = self._encode_texts([name])[0]
+            self._name_emb_cache[name] = emb
+        return emb
     
     # =========================================================================
     # PHASE B: Matching Algorithm (SANTOS Querying)
     # =========================================================================
     
-    def compute_similarity(self, src: TableSignature, tgt: TableSignature) -> SimilarityScore:
-        """Compute SANTOS-style similarity between two tables"""
+    def compute_similarity(self, src: TableSignature, tgt: TableSignature,
+                           semantic_score: Optional[float] = None,
+                           statistical_score: Optional[float] = None) -> SimilarityScore:
+        """Compute SANTOS-style similarity between two tables
         
-        semantic_score = self._cosine_similarity(
-            src.column_embedding, 
-            tgt.column_embedding
-        )
+        semantic_score / statistical_score may be passed in from precomputed
+        pairwise matrices (see detect_cross_source_duplicates) to skip the
+        per-pair computation.
+        """
         
-        type_overlap = self._jaccard_similarity(
-            set(src.type_signature.split(',')),
-            set(tgt.type_signature.split(','))
-        )
+        if semantic_score is None:
+            semantic_score = self._cosine_similarity(
+                src.column_embedding, 
+                tgt.column_embedding
+            )
         
-        name_overlap = self._jaccard_similarity(
-            set(src.name_signature.split(',')),
-            set(tgt.name_signature.split(','))
-        )
+        type_overlap = self._jaccard_similarity(src.type_mask, tgt.type_mask)
+        name_overlap = self._jaccard_similarity(src.name_set, tgt.name_set)
         
         schema_score = (type_overlap + name_overlap) / 2
-        statistical_score = self._statistical_similarity(src, tgt)
+        if statistical_score is None:
+            statistical_score = self._statistical_similarity(src, tgt)
         relationship_score = self._relationship_similarity(src, tgt)
         matching_columns = self._find_column_matches(src, tgt)
         
@@ -290,14 +579,38 @@ class CrossSourceDuplicateDetector:
             matching_columns=matching_columns
         )
     
+    def _embedding_matrix(self, sigs: List[TableSignature]) -> np.ndarray:
+        """Stack table embeddings into an (n, d) matrix (zero rows if missing)
+        
+        int8 embeddings stay int8 for _pairwise_cosine; float rows are
+        L2-normalized.
+        """
+        first = next((s.column_embedding for s in sigs if s.column_embedding is not None), None)
+        dim, dtype = (1, np.float32) if first is None else (first.shape[0], first.dtype)
+        matrix = np.zeros((len(sigs), dim), dtype=dtype)
+        for i, sig in enumerate(sigs):
+            if sig.column_embedding is not None:
+                matrix[i] = sig.column_embedding
+        if dtype != np.int8:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+    
     def _cosine_similarity(self, a: np.ndarray, b: np.ndarray) -> float:
         if a is None or b is None:
             return 0.0
-        return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+        # Upcast so int8 embeddings can't overflow
+        a = np.asarray(a, dtype=np.float32)
+        b = np.asarray(b, dtype=np.float32)
+        # One sqrt over vdot products avoids two linalg.norm dispatches
+        return float(np.dot(a, b) / np.sqrt(np.vdot(a, a) * np.vdot(b, b)))
     
-    def _jaccard_similarity(self, set_a: set, set_b: set) -> float:
+    def _jaccard_similarity(self, set_a, set_b) -> float:
+        """Jaccard of two sets, or of two int bitmasks via popcount"""
         if not set_a or not set_b:
             return 0.0
+        if isinstance(set_a, int) and isinstance(set_b, int):
+            return (set_a & set_b).bit_count() / (set_a | set_b).bit_count()
         intersection = len(set_a & set_b)
         union = len(set_a | set_b)
         return intersection / union if union > 0 else 0.0
@@ -316,51 +629,48 @@ class CrossSourceDuplicateDetector:
         
         return (row_sim + col_sim) / 2
     
-    def _relationship_similarity(self, src: TableSignature, tgt: TableSignature) -> float:
-        """RS_CONF equivalent: Compare FK patterns"""
-        def get_fk_pattern(cols: List[Dict]) -> set:
-            patterns = set()
-            for c in cols:
-                name = c.get('name', '').lower()
-                if name.endswith('_id') or name.endswith('_key'):
-                    entity = name.rsplit('_', 1)[0]
-                    patterns.add(entity)
-            return patterns
+    def _statistical_matrix(self, srcs: List[TableSignature], tgts: List[TableSignature]) -> np.ndarray:
+        """_statistical_similarity for every (src, tgt) pair via broadcasting"""
+        src_rows = np.array([s.row_count for s in srcs], dtype=np.float64)[:, None]
+        tgt_rows = np.array([t.row_count for t in tgts], dtype=np.float64)[None, :]
+        src_cols = np.array([s.column_count for s in srcs], dtype=np.float64)[:, None]
+        tgt_cols = np.array([t.column_count for t in tgts], dtype=np.float64)[None, :]
+        
+        log_ratio = np.abs(np.log10(src_rows + 1) - np.log10(tgt_rows + 1))
+        row_sim = np.where(
+            (src_rows > 0) & (tgt_rows > 0),
+            np.maximum(0, 1 - log_ratio / 3),
+            0.5
+        )
         
-        src_patterns = get_fk_pattern(src.columns)
-        tgt_patterns = get_fk_pattern(tgt.columns)
+        max_cols = np.maximum(src_cols, tgt_cols)
+        min_cols = np.minimum(src_cols, tgt_cols)
+        col_sim = np.divide(min_cols, max_cols, out=np.zeros_like(max_cols), where=max_cols > 0)
         
-        return self._jaccard_similarity(src_patterns, tgt_patterns)
+        return (row_sim + col_sim) / 2
+    
+    def _relationship_similarity(self, src: TableSignature, tgt: TableSignature) -> float:
+        """RS_CONF equivalent: Compare FK patterns"""
+        return self._jaccard_similarity(src.fk_pattern, tgt.fk_pattern)
     
     def _find_column_matches(self, src: TableSignature, tgt: TableSignature, 
                              threshold: float = 0.7) -> List[Tuple[str, str, float]]:
         """Find individual column matches using embedding similarity"""
-        matches = []
+        src_matrix = self._column_name_matrix(src)
+        tgt_matrix = self._column_name_matrix(tgt)
+        if not src.col_names or not tgt.col_names:
+            return []
         
-        for src_col in src.columns:
-            src_name = src_col.get('name', '')
-            if not src_name:
-                continue
-            src_emb = self.embedding_model.encode(src_name)
-            
-            best_match = None
-            best_sim = 0
-            
-            for tgt_col in tgt.columns:
-                tgt_name = tgt_col.get('name', '')
-                if not tgt_name:
-                    continue
-                tgt_emb = self.embedding_model.encode(tgt_name)
-                sim = self._cosine_similarity(src_emb, tgt_emb)
-                
-                if sim > best_sim and sim >= threshold:
-                    best_sim = sim
-                    best_match = tgt_name
-                    
-            if best_match:
-                matches.append((src_name, best_match, round(best_sim, 3)))
-                
-        return matches
+        # All (src, tgt) cosines in one matmul; rows are already unit-norm.
+        # argmax keeps the first best target, like the strict '>' scan did.
+        sims = _pairwise_cosine(src_matrix, tgt_matrix)
+        best_idx = sims.argmax(axis=1)
+        best_sims = sims[np.arange(sims.shape[0]), best_idx]
+        
+        return [
+            (src.col_names[i], tgt.col_names[best_idx[i]], round(float(best_sims[i]), 3))
+            for i in np.flatnonzero((best_sims >= threshold) & (best_sims > 0))
+        ]
     
     # =========================================================================
     # Cross-Source Detection
@@ -370,10 +680,13 @@ class CrossSourceDuplicateDetector:
         """Main entry point: Detect duplicates between Snowflake and Databricks"""
         threshold = min_threshold or self.MIN_SIMILARITY_THRESHOLD
         
-        if not self.snowflake_tables:
+        if not self.snowflake_tables and not self.databricks_tables:
+            self.extract_all_signatures()
+        elif not self.snowflake_tables:
             self.extract_snowflake_signatures()
-        if not self.databricks_tables:
+        elif not self.databricks_tables:
             self.extract_databricks_signatures()
+        self._precompute_column_name_embeddings()
             
         results = []
         all_scores = []
@@ -381,13 +694,39 @@ class CrossSourceDuplicateDetector:
         print(f"\n🔍 Comparing {len(self.snowflake_tables)} Snowflake tables "
               f"with {len(self.databricks_tables)} Databricks tables...")
         
-        for db_id, db_sig in self.databricks_tables.items():
-            for sf_id, sf_sig in self.snowflake_tables.items():
-                score = self.compute_similarity(db_sig, sf_sig)
-                all_scores.append(score)
-                
-                if score.total_score >= threshold:
-                    results.append(score)
+        db_sigs = list(self.databricks_tables.values())
+        sf_sigs = list(self.snowflake_tables.values())
+        
+        # Whole-table semantic and statistical scores for every pair at once
+        semantic = _pairwise_cosine(self._embedding_matrix(db_sigs), self._embedding_matrix(sf_sigs))
+        statistical = self._statistical_matrix(db_sigs, sf_sigs)
+        
+        # Blocker: bound each pair's total with name and relationship overlap at
+        # their maximum of 1.0. Pairs whose bound misses the threshold can't
+        # match, so column matching and scoring are skipped for them.
+        type_overlap = np.array([
+            [self._jaccard_similarity(db_sig.type_mask, sf_sig.type_mask) for sf_sig in sf_sigs]
+            for db_sig in db_sigs
+        ]).reshape(len(db_sigs), len(sf_sigs))
+        upper_bound = (
+            self.WEIGHT_SEMANTIC * semantic +
+            self.WEIGHT_SCHEMA * (type_overlap + 1.0) / 2 +
+            self.WEIGHT_STATISTICAL * statistical +
+            self.WEIGHT_RELATIONSHIP
+        )
+        candidates = np.argwhere(upper_bound >= threshold - 1e-9)
+        print(f"   Blocker kept {len(candidates)} of {upper_bound.size} pairs")
+        
+        for i, j in candidates:
+            score = self.compute_similarity(
+                db_sigs[i], sf_sigs[j],
+                semantic_score=float(semantic[i, j]),
+                statistical_score=float(statistical[i, j])
+            )
+            all_scores.append(score)
+            
+            if score.total_score >= threshold:
+                results.append(score)
         
         all_scores.sort(key=lambda x: x.total_score, reverse=True)
         print(f"\n   DEBUG: Top 5 scores (regardless of threshold):")
@@ -408,42 +747,12 @@ class CrossSourceDuplicateDetector:
             results = self.detect_cross_source_duplicates(min_threshold)
             
         threshold = min_threshold or self.MIN_SIMILARITY_THRESHOLD
-        edges_created = 0
-        
-        create_query = """
-        MATCH (db:FederatedTable {full_name: $databricks_table})
-        MATCH (sf:OlistData)
-        WHERE toLower(sf.schema + '.' + sf.name) = toLower($snowflake_table)
-        MERGE (db)-[r:SIMILAR_TO]->(sf)
-        SET r.score = $score,
-            r.confidence = $confidence,
-            r.semantic_score = $semantic_score,
-            r.type_overlap = $type_overlap,
-            r.name_overlap = $name_overlap,
-            r.statistical_score = $statistical_score,
-            r.relationship_score = $relationship_score,
-            r.matching_columns = $matching_columns,
-            r.algorithm = 'SANTOS-adapted',
-            r.detected_at = datetime()
-        RETURN r
-        """
         
-        with self.driver.session() as session:
-            for score in results:
-                if score.total_score < threshold:
-                    continue
-                    
-                db_table = score.source_table
-                sf_table = score.target_table
-                
-                matching_cols_str = "; ".join([
-                    f"{src}->{tgt} ({sim})" 
-                    for src, tgt, sim in score.matching_columns
-                ])
-                
-                result = session.run(create_query, {
-                    'databricks_table': db_table,
-                    'snowflake_table': sf_table,
+        rows = [
+            {
+                'databricks_table': score.source_table,
+                'snowflake_table': score.target_table,  # already schema.name lower-cased
+                'props': {
                     'score': round(score.total_score, 4),
                     'confidence': score.confidence,
                     'semantic_score': round(score.column_semantic_score, 4),
@@ -451,16 +760,105 @@ class CrossSourceDuplicateDetector:
                     'name_overlap': round(score.name_overlap_score, 4),
                     'statistical_score': round(score.statistical_score, 4),
                     'relationship_score': round(score.relationship_score, 4),
-                    'matching_columns': matching_cols_str
-                })
-                
-                if result.single():
-                    edges_created += 1
-                    print(f"  ✅ {db_table} --[SIMILAR_TO {score.total_score:.2%}]--> {sf_table}")
-                    
-        print(f"\n✅ Created {edges_created} SIMILAR_TO edges in Neo4j")
+                    'matching_columns': "; ".join([
+                        f"{src}->{tgt} ({sim})" 
+                        for src, tgt, sim in score.matching_columns
+                    ]),
+                    'algorithm': 'SANTOS-adapted'
+                }
+            }
+            for score in results
+            if score.total_score >= threshold
+        ]
+        
+        edges_created = new_edges = 0
+        if rows:
+            self._ensure_qualified_name_index()
+            ensure_validation_indexes(self.driver, ('SIMILAR_TO',))
+            edges_created, new_edges = self._write_similarity_edges(rows)
+        
+        print(f"\n✅ Created {edges_created} SIMILAR_TO edges in Neo4j ({new_edges} new)")
         return edges_created
     
+    # Per-row merge, shared by the UNWIND and apoc.periodic.iterate paths.
+    # row_count_delta_ratio is read by the SHACL CrossPlatformConsistencyShape;
+    # -1 marks a ratio that can't be computed. db.updated_at feeds the graph
+    # fingerprint that keys the evaluation query cache.
+    _SIMILAR_TO_MERGE = """
+        MATCH (db:FederatedTable {full_name: row.databricks_table})
+        MATCH (sf:OlistData {qualified_name_lc: row.snowflake_table})
+        MERGE (db)-[r:SIMILAR_TO]->(sf)
+        SET r += row.props,
+            r.detected_at = datetime(),
+            r.row_count_delta_ratio = """ + ROW_COUNT_DELTA_RATIO + """,
+            db.updated_at = datetime()
+    """
+    
+    # Above this many edges, commit in APOC batches instead of one transaction
+    EDGE_BATCH_SIZE = 500
+    
+    def _ensure_qualified_name_index(self):
+        """Backfill qualified_name_lc on OlistData nodes ingested before it existed"""
+        with self.driver.session() as session:
+            session.run("""
+                MATCH (t:OlistData)
+                WHERE t.qualified_name_lc IS NULL
+                SET t.qualified_name_lc = toLower(t.schema + '.' + t.name)
+            """).consume()
+            session.run(
+                "CREATE INDEX olistQualifiedNameLc IF NOT EXISTS "
+                "FOR (t:OlistData) ON (t.qualified_name_lc)"
+            ).consume()
+    
+    def _write_similarity_edges(self, rows: List[Dict]) -> Tuple[int, int]:
+        """MERGE the edges; returns (edges merged, edges newly created)"""
+        if len(rows) > self.EDGE_BATCH_SIZE:
+            try:
+                return self._write_similarity_edges_apoc(rows)
+            except ClientError as e:
+                print(f"⚠️  apoc.periodic.iterate unavailable ({e.code}), using one transaction")
+        
+        # One UNWIND over all edges: a single round-trip and commit
+        query = "UNWIND $rows AS row" + self._SIMILAR_TO_MERGE + "RETURN count(r) AS edges"
+        
+        def work(tx):
+            result = tx.run(query, rows=rows)
+            edges = result.single()['edges']
+            return edges, result.consume().counters.relationships_created
+        
+        with self.driver.session() as session:
+            return session.execute_write(work)
+    
+    def _write_similarity_edges_apoc(self, rows: List[Dict]) -> Tuple[int, int]:
+        """MERGE the edges in EDGE_BATCH_SIZE commits via apoc.periodic.iterate
+        
+        The batches can't return rows, so the merged edges are counted
+        afterwards with the same endpoint lookups.
+        """
+        with self.driver.session() as session:
+            record = session.run("""
+                CALL apoc.periodic.iterate(
+                    'UNWIND $rows AS row RETURN row',
+                    $merge,
+                    {batchSize: $batch_size, params: {rows: $rows}}
+                )
+                YIELD updateStatistics, errorMessages
+                RETURN updateStatistics, errorMessages
+            """, merge=self._SIMILAR_TO_MERGE, batch_size=self.EDGE_BATCH_SIZE,
+                rows=rows).single()
+        
+            if record['errorMessages']:
+                raise RuntimeError(f"SIMILAR_TO batch write failed: {record['errorMessages']}")
+            
+            edges = session.run("""
+                UNWIND $rows AS row
+                MATCH (:FederatedTable {full_name: row.databricks_table})
+                      -[r:SIMILAR_TO]->(:OlistData {qualified_name_lc: row.snowflake_table})
+                RETURN count(r) AS edges
+            """, rows=rows).single()['edges']
+        
+        return edges, record['updateStatistics']['relationshipsCreated']
+    
     def get_similarity_report(self, results: List[SimilarityScore] = None) -> str:
         """Generate human-readable report"""
         if results is None:
@@ -25,6 +25,8 @@ from src.federation.databricks_metadata_extractor import (
     DatabricksMetadataExtractor, 
     TableFingerprint
 )
+from src.common.derived_properties import is_pii_column_name, REFRESH_ROW_COUNT_DELTA_RATIO
+from src.common.validation_indexes import ensure_validation_indexes
 
 load_dotenv()
 
@@ -70,7 +72,7 @@ class FederatedKGBuilder:
         }
     
     def create_constraints(self):
-        """Create uniqueness constraints for federated schema"""
+        """Create uniqueness constraints and validation indexes for federated schema"""
         constraints = [
             "CREATE CONSTRAINT IF NOT EXISTS FOR (t:FederatedTable) REQUIRE t.full_name IS UNIQUE",
             "CREATE CONSTRAINT IF NOT EXISTS FOR (c:FederatedColumn) REQUIRE c.full_name IS UNIQUE",
@@ -84,6 +86,8 @@ class FederatedKGBuilder:
                 except Exception as e:
                     pass  # Constraint may already exist
         
+        ensure_validation_indexes(self.driver, ('FederatedTable', 'FederatedColumn', 'SIMILAR_TO'))
+        
         print("✅ Federated constraints created")
     
     def create_data_source(self, source_name: str, source_type: str, 
@@ -139,8 +143,11 @@ class FederatedKGBuilder:
                         t.tags = $tags,
                         t.column_signature = $column_signature,
                         t.type_signature = $type_signature,
-                        t.created_at = datetime()
+                        t.created_at = datetime(),
+                        t.updated_at = datetime()
                     
+                    WITH t
+                    """ + REFRESH_ROW_COUNT_DELTA_RATIO + """
                     WITH t
                     MATCH (s:DataSource {name: $source_name})
                     MERGE (t)-[:FROM_SOURCE]->(s)
@@ -172,6 +179,7 @@ class FederatedKGBuilder:
                             c.position = $position,
                             c.nullable = $nullable,
                             c.sensitivity = $sensitivity,
+                            c.pii_hint = $pii_hint,
                             c.source = 'databricks'
                         
                         WITH c
@@ -184,6 +192,7 @@ class FederatedKGBuilder:
                         position=col.position,
                         nullable=col.nullable,
                         sensitivity=col.sensitivity,
+                        pii_hint=is_pii_column_name(col.name),
                         table_full_name=fp.full_name
                     )
                     
@@ -235,8 +244,11 @@ class FederatedKGBuilder:
                         t.row_count = $row_count,
                         t.column_count = $column_count,
                         t.fingerprint = $fingerprint,
-                        t.created_at = datetime()
+                        t.created_at = datetime(),
+                        t.updated_at = datetime()
                     
+                    WITH t
+                    """ + REFRESH_ROW_COUNT_DELTA_RATIO + """
                     WITH t
                     MATCH (s:DataSource {name: $source_name})
                     MERGE (t)-[:FROM_SOURCE]->(s)
@@ -12,12 +12,22 @@ Now includes:
 - Cross-source consistency checks
 """
 
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, READ_ACCESS, unit_of_work
+from neo4j.exceptions import ClientError
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, defaultdict
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, TextIO
 from datetime import datetime
 from enum import Enum
+from functools import partial
+import io
 import os
+import re
+import threading
+import orjson
+import pandas as pd
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -30,7 +40,7 @@ class Severity(Enum):
     INFO = "info"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Violation:
     """Represents a single constraint violation"""
     shape_name: str
@@ -41,21 +51,14 @@ class Violation:
     property_path: Optional[str] = None
     actual_value: Optional[str] = None
     expected_value: Optional[str] = None
+    # severity.value, cached so counting/sorting hashes a plain str
+    _sev: str = field(init=False, repr=False, compare=False)
     
-    def to_dict(self) -> Dict:
-        return {
-            'shape': self.shape_name,
-            'node': self.node_id,
-            'label': self.node_label,
-            'message': self.message,
-            'severity': self.severity.value,
-            'property': self.property_path,
-            'actual': self.actual_value,
-            'expected': self.expected_value
-        }
+    def __post_init__(self):
+        object.__setattr__(self, '_sev', self.severity.value)
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationReport:
     """Complete validation report"""
     timestamp: datetime
@@ -63,22 +66,33 @@ class ValidationReport:
     shapes_evaluated: int
     violations: List[Violation] = field(default_factory=list)
     scope: str = "all"  # "all", "snowflake", "databricks", "federated"
+    _severity_counts: Optional[Counter] = field(default=None, init=False, repr=False, compare=False)
     
     @property
     def is_valid(self) -> bool:
         return len(self.violations) == 0
     
+    def _counts(self) -> Counter:
+        """Violations per severity, counted in one pass and cached
+        
+        Recounted if violations were appended since the last count.
+        """
+        counts = self._severity_counts
+        if counts is None or counts.total() != len(self.violations):
+            counts = self._severity_counts = Counter(v._sev for v in self.violations)
+        return counts
+    
     @property
     def critical_count(self) -> int:
-        return sum(1 for v in self.violations if v.severity == Severity.CRITICAL)
+        return self._counts()['critical']
     
     @property
     def warning_count(self) -> int:
-        return sum(1 for v in self.violations if v.severity == Severity.WARNING)
+        return self._counts()['warning']
     
     @property
     def info_count(self) -> int:
-        return sum(1 for v in self.violations if v.severity == Severity.INFO)
+        return self._counts()['info']
     
     def summary(self) -> Dict:
         return {
@@ -92,6 +106,34 @@ class ValidationReport:
             'warnings': self.warning_count,
             'info': self.info_count
         }
+    
+    # Column names match the Violation fields, as orjson writes them
+    RECORD_COLUMNS = ['shape_name', 'node_id', 'node_label', 'message', 'severity',
+                      'property_path', 'actual_value', 'expected_value']
+    
+    def to_dataframe(self) -> pd.DataFrame:
+        """One row per violation, built column-wise in a single pass"""
+        return pd.DataFrame.from_records(
+            [
+                (v.shape_name, v.node_id, v.node_label, v.message, v._sev,
+                 v.property_path, v.actual_value, v.expected_value)
+                for v in self.violations
+            ],
+            columns=self.RECORD_COLUMNS
+        )
+    
+    def write_jsonl(self, fp: TextIO):
+        """Write violations as JSON lines (one violation object per line)"""
+        self.to_dataframe().to_json(fp, orient='records', lines=True)
+    
+    def to_json(self) -> bytes:
+        """Summary plus violations as a JSON document
+        
+        orjson serializes the Violation dataclasses (and their Severity
+        enum) directly, skipping the underscore-prefixed _sev cache, so no
+        intermediate dict is built per violation.
+        """
+        return orjson.dumps({'summary': self.summary(), 'violations': self.violations})
 
 
 class SHACLValidator:
@@ -105,6 +147,23 @@ class SHACLValidator:
     - Cross-source consistency checks
     """
     
+    # Shape queries in flight at once (one session per worker)
+    MAX_CONCURRENT_SHAPES = 8
+    # Server-side timeout (seconds) for a single shape query
+    SHAPE_TIMEOUT = 30.0
+    # First release whose parallel runtime is usable (Enterprise only)
+    PARALLEL_RUNTIME_SINCE = (5, 13)
+    # Labels / relationship types whose totals feed reports and stats (the
+    # ones shapes read are counted too, for their reuse keys)
+    COUNTED_LABELS = ('OlistData', 'OlistColumn', 'FederatedTable', 'FederatedColumn', 'Order')
+    COUNTED_REL_TYPES = ('SIMILAR_TO',)
+    # What the fused OlistData scan reads, whichever shapes it evaluates
+    FUSED_SCAN_LABELS = ('OlistData', 'OlistColumn')
+    FUSED_SCAN_REL_TYPES = ('DERIVES_FROM', 'HAS_COLUMN')
+    # Labels ingest stamps with updated_at whenever it writes a node, its
+    # columns or its edges
+    STAMPED_LABELS = ('OlistData', 'FederatedTable')
+    
     def __init__(self):
         """Initialize Neo4j connection"""
         neo4j_password = os.getenv('NEO4J_PASSWORD')
@@ -113,146 +172,310 @@ class SHACLValidator:
             "bolt://localhost:7687",
             auth=("neo4j", neo4j_password)
         )
+        self._local = threading.local()
+        self._sessions = {}  # owning thread -> session
+        self._sessions_lock = threading.Lock()
+        self._has_apoc_meta = True
         
         with self.driver.session() as session:
-            session.run("RETURN 1")
+            server = session.run("""
+                CALL dbms.components() YIELD name, versions, edition
+                WHERE name = 'Neo4j Kernel'
+                RETURN versions[0] AS version, edition
+            """).single()
         
         print("✅ SHACL Validator connected to Neo4j")
         
+        # The fused OlistData scan touches every node, so let the server
+        # split it across cores where it can; otherwise it runs serially
+        self._parallel_runtime = (
+            server is not None
+            and server['edition'] == 'enterprise'
+            and self._parse_version(server['version']) >= self.PARALLEL_RUNTIME_SINCE
+        )
+        
         # Define all shapes
         self.snowflake_shapes = self._define_snowflake_shapes()
         self.federated_shapes = self._define_federated_shapes()
         self.shapes = self.snowflake_shapes + self.federated_shapes
+        
+        # Lookup maps so selecting shapes by name/scope doesn't rescan the list
+        self._shapes_by_name = {s['name']: s for s in self.shapes}
+        self._shapes_by_scope = defaultdict(list)
+        for s in self.shapes:
+            self._shapes_by_scope[s.get('scope', 'unknown')].append(s)
+        
+        # Everything counted when apoc.meta.stats isn't there
+        labels = dict.fromkeys(self.COUNTED_LABELS)
+        rel_types = dict.fromkeys(self.COUNTED_REL_TYPES)
+        for s in self.shapes:
+            shape_labels, shape_rel_types = self._shape_reads(s)
+            labels.update(dict.fromkeys(shape_labels))
+            rel_types.update(dict.fromkeys(shape_rel_types))
+        self._counted_labels = tuple(labels)
+        self._counted_rel_types = tuple(rel_types)
+        
+        # Transaction functions built once and reused on every run
+        for shape in self.shapes:
+            if 'validation_query' in shape:
+                shape['work'] = self._shape_work(
+                    shape['name'], shape['validation_query'], shape.get('params', {}),
+                    partial(self._make_violation, shape)
+                )
+        self._fused_work: Dict[tuple, Callable] = {}
+        # Shape name -> (reuse key, violations) of its last successful run
+        self._shape_cache: Dict[str, tuple] = {}
+        
+        # The report template is compiled once; the bytecode cache (in the
+        # system temp dir) lets later processes skip the compile as well
+        report_env = Environment(
+            loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), 'templates')),
+            bytecode_cache=FileSystemBytecodeCache(),
+            keep_trailing_newline=True
+        )
+        self._report_template = report_env.get_template('report.html.j2')
+        
+        # Long-lived so each worker keeps its read session across runs
+        self._pool = ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_SHAPES)
+    
+    def _session(self):
+        """Read session owned by the calling thread, opened on first use
+        
+        Sessions aren't thread-safe, so pool workers each get their own;
+        they stay open until close() instead of being reopened per query.
+        Callers' threads (e.g. one per Gradio request) come and go, so the
+        sessions of threads that have exited are closed as new ones open.
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self.driver.session(default_access_mode=READ_ACCESS)
+            self._local.session = session
+            with self._sessions_lock:
+                for thread in [t for t in self._sessions if not t.is_alive()]:
+                    self._sessions.pop(thread).close()
+                self._sessions[threading.current_thread()] = session
+        return session
+    
+    @staticmethod
+    def _single_record(tx, query: str):
+        return tx.run(query).single()
+    
+    def _graph_counts(self) -> Dict[str, int]:
+        """Node totals per label and relationship totals per type
+        
+        apoc.meta.stats() reads every total from the count store in one
+        call. Without APOC, each counted label/type is a count-store lookup
+        of its own, still in a single round-trip.
+        """
+        if self._has_apoc_meta:
+            try:
+                record = self._session().execute_read(self._single_record, """
+                    CALL apoc.meta.stats() YIELD labels, relTypesCount
+                    RETURN labels, relTypesCount
+                """)
+                return {**record['labels'], **record['relTypesCount']}
+            except ClientError as e:
+                print(f"  ⚠️ apoc.meta.stats unavailable ({e.code}), counting per label")
+                self._has_apoc_meta = False
+        
+        subqueries = [f"CALL {{ MATCH (:{label}) RETURN count(*) AS `{label}` }}"
+                      for label in self._counted_labels]
+        subqueries += [f"CALL {{ MATCH ()-[:{rel}]->() RETURN count(*) AS `{rel}` }}"
+                       for rel in self._counted_rel_types]
+        query = "\n".join(subqueries) + "\nRETURN " + ", ".join(
+            f"`{name}`" for name in self._counted_labels + self._counted_rel_types
+        )
+        return dict(self._session().execute_read(self._single_record, query))
+    
+    def _last_modified(self) -> Dict[str, object]:
+        """Latest updated_at per stamped label (answered from its range index)"""
+        subqueries = [f"CALL {{ MATCH (n:{label}) RETURN max(n.updated_at) AS {label} }}"
+                      for label in self.STAMPED_LABELS]
+        query = "\n".join(subqueries) + "\nRETURN " + ", ".join(self.STAMPED_LABELS)
+        return dict(self._session().execute_read(self._single_record, query))
+    
+    def _shape_reads(self, shape: Dict) -> tuple:
+        """(labels, relationship types) a shape's query reads"""
+        if 'scan_condition' in shape:
+            return self.FUSED_SCAN_LABELS, self.FUSED_SCAN_REL_TYPES
+        return shape['read_labels'], shape['read_rel_types']
+    
+    def _reuse_key(self, shape: Dict, counts: Dict, last_modified: Dict) -> tuple:
+        """Totals of what the shape reads, plus the ingest stamps on it
+        
+        Adding or deleting a node or edge the shape reads changes a total;
+        ingest rewriting a table (properties, columns, edges) moves its
+        label's latest updated_at. Edits made outside ingest stamp nothing,
+        so call clear_shape_cache() after those.
+        """
+        labels, rel_types = self._shape_reads(shape)
+        return (
+            tuple(counts.get(name, 0) for name in labels + rel_types),
+            tuple(last_modified.get(label) for label in labels if label in self.STAMPED_LABELS)
+        )
+    
+    def clear_shape_cache(self):
+        """Re-run every shape on the next validation"""
+        self._shape_cache.clear()
+    
+    @staticmethod
+    def _parse_version(version: str) -> tuple:
+        """'5.14.0' / '5.20-aura' -> (5, 14, 0) / (5, 20)"""
+        return tuple(int(part) for part in re.findall(r'\d+', version or '')[:3])
+    
+    def _shape_work(self, name: str, query: str, params: Dict,
+                    to_violation: Callable) -> Callable:
+        """Read transaction function for one shape query
+        
+        Records are turned into Violations as they stream off the Bolt result,
+        so no intermediate list of Records is kept. The shape name goes into
+        the transaction metadata, so it shows up in Neo4j's query log and in
+        SHOW TRANSACTIONS.
+        """
+        @unit_of_work(timeout=self.SHAPE_TIMEOUT, metadata={'shape': name})
+        def work(tx):
+            return [to_violation(record) for record in tx.run(query, params)]
+        return work
     
     def _define_snowflake_shapes(self) -> List[Dict]:
-        """Original Snowflake/OlistData shapes (1-10)"""
+        """Original Snowflake/OlistData shapes (1-10)
+        
+        Per-table property shapes have no query of their own: they give a
+        scan_condition and scan_row evaluated by the single OlistData scan in
+        _run_fused_olist_scan.
+        """
         return [
             {
                 'name': 'LineageCompletenessShape',
                 'description': 'Derived tables must have DERIVES_FROM lineage',
                 'severity': Severity.CRITICAL,
                 'scope': 'snowflake',
-                'validation_query': """
-                    MATCH (t:OlistData)
-                    WHERE t.schema IN ['OLIST_MARKETING', 'OLIST_ANALYTICS']
-                    AND NOT EXISTS {
-                        MATCH (t)-[:DERIVES_FROM]->(:OlistData)
-                    }
-                    RETURN t.schema + '.' + t.name AS node_id,
-                           'OlistData' AS node_label,
-                           'Derived table missing DERIVES_FROM lineage' AS message,
-                           t.schema AS property_path,
-                           'No lineage' AS actual_value,
-                           'At least 1 DERIVES_FROM edge' AS expected_value
-                """
+                'target_label': 'OlistData',
+                'scan_condition': "t.schema IN $derived_schemas AND NOT has_lineage",
+                'scan_row': """{
+                    node_id: t.qualified_name,
+                    message: 'Derived table missing DERIVES_FROM lineage',
+                    property_path: t.schema,
+                    actual_value: 'No lineage',
+                    expected_value: 'At least 1 DERIVES_FROM edge'
+                }""",
+                'params': {'derived_schemas': ['OLIST_MARKETING', 'OLIST_ANALYTICS']}
             },
             {
                 'name': 'SourceTableShape',
                 'description': 'Source tables should not have upstream lineage',
                 'severity': Severity.WARNING,
                 'scope': 'snowflake',
-                'validation_query': """
-                    MATCH (t:OlistData)
-                    WHERE t.schema = 'OLIST_SALES'
-                    AND EXISTS {
-                        MATCH (t)-[:DERIVES_FROM]->(:OlistData)
-                    }
-                    RETURN t.schema + '.' + t.name AS node_id,
-                           'OlistData' AS node_label,
-                           'Source table has unexpected upstream lineage' AS message,
-                           'DERIVES_FROM' AS property_path,
-                           'Has upstream' AS actual_value,
-                           'No upstream lineage' AS expected_value
-                """
+                'target_label': 'OlistData',
+                'scan_condition': "t.schema = $source_schema AND has_lineage",
+                'scan_row': """{
+                    node_id: t.qualified_name,
+                    message: 'Source table has unexpected upstream lineage',
+                    property_path: 'DERIVES_FROM',
+                    actual_value: 'Has upstream',
+                    expected_value: 'No upstream lineage'
+                }""",
+                'params': {'source_schema': 'OLIST_SALES'}
             },
             {
                 'name': 'RowCountQualityShape',
                 'description': 'Every table must have row_count > 0',
                 'severity': Severity.CRITICAL,
                 'scope': 'snowflake',
-                'validation_query': """
-                    MATCH (t:OlistData)
-                    WHERE t.row_count IS NULL OR t.row_count <= 0
-                    RETURN t.schema + '.' + t.name AS node_id,
-                           'OlistData' AS node_label,
-                           'Table has invalid row count' AS message,
-                           'row_count' AS property_path,
-                           COALESCE(toString(t.row_count), 'NULL') AS actual_value,
-                           '> 0' AS expected_value
-                """
+                'target_label': 'OlistData',
+                'scan_condition': "t.row_count IS NULL OR t.row_count <= 0",
+                'scan_row': """{
+                    node_id: t.qualified_name,
+                    message: 'Table has invalid row count',
+                    property_path: 'row_count',
+                    actual_value: COALESCE(toString(t.row_count), 'NULL'),
+                    expected_value: '> 0'
+                }"""
             },
             {
                 'name': 'ColumnCompletenessShape',
                 'description': 'Every table must have at least 1 column defined',
                 'severity': Severity.CRITICAL,
                 'scope': 'snowflake',
-                'validation_query': """
-                    MATCH (t:OlistData)
-                    WHERE NOT EXISTS {
-                        MATCH (t)-[:HAS_COLUMN]->(:OlistColumn)
-                    }
-                    RETURN t.schema + '.' + t.name AS node_id,
-                           'OlistData' AS node_label,
-                           'Table has no column definitions' AS message,
-                           'HAS_COLUMN' AS property_path,
-                           '0 columns' AS actual_value,
-                           '>= 1 column' AS expected_value
-                """
+                'target_label': 'OlistData',
+                'scan_condition': "NOT has_columns",
+                'scan_row': """{
+                    node_id: t.qualified_name,
+                    message: 'Table has no column definitions',
+                    property_path: 'HAS_COLUMN',
+                    actual_value: '0 columns',
+                    expected_value: '>= 1 column'
+                }"""
             },
             {
                 'name': 'DuplicateConsistencyShape',
                 'description': 'Exact duplicate pairs should have matching row counts',
                 'severity': Severity.WARNING,
                 'scope': 'snowflake',
+                'target_label': 'OlistData',
+                'read_labels': ('OlistData',),
+                'read_rel_types': ('OLIST_DUPLICATE',),
                 'validation_query': """
                     MATCH (t1:OlistData)-[d:OLIST_DUPLICATE]->(t2:OlistData)
-                    WHERE d.match_type = 'EXACT_SCHEMA'
+                    WHERE d.match_type = $match_type
                     AND t1.row_count <> t2.row_count
-                    RETURN t1.schema + '.' + t1.name + ' <-> ' + t2.schema + '.' + t2.name AS node_id,
+                    RETURN t1.qualified_name + ' <-> ' + t2.qualified_name AS node_id,
                            'OLIST_DUPLICATE' AS node_label,
                            'Exact duplicates have mismatched row counts' AS message,
                            'row_count' AS property_path,
                            toString(t1.row_count) + ' vs ' + toString(t2.row_count) AS actual_value,
                            'Equal row counts' AS expected_value
-                """
+                """,
+                'params': {'match_type': 'EXACT_SCHEMA'}
             },
             {
                 'name': 'DuplicateConfidenceShape',
                 'description': 'Duplicate relationships should have confidence >= 0.5',
                 'severity': Severity.INFO,
                 'scope': 'snowflake',
+                'target_label': 'OlistData',
+                'read_labels': ('OlistData',),
+                'read_rel_types': ('OLIST_DUPLICATE',),
                 'validation_query': """
                     MATCH (t1:OlistData)-[d:OLIST_DUPLICATE]->(t2:OlistData)
-                    WHERE d.confidence < 0.5
-                    RETURN t1.schema + '.' + t1.name + ' <-> ' + t2.schema + '.' + t2.name AS node_id,
+                    WHERE d.confidence < $min_confidence
+                    RETURN t1.qualified_name + ' <-> ' + t2.qualified_name AS node_id,
                            'OLIST_DUPLICATE' AS node_label,
                            'Low confidence duplicate - may be false positive' AS message,
                            'confidence' AS property_path,
                            toString(d.confidence) AS actual_value,
-                           '>= 0.5' AS expected_value
-                """
+                           '>= ' + toString($min_confidence) AS expected_value
+                """,
+                'params': {'min_confidence': 0.5}
             },
             {
                 'name': 'LineageConfidenceShape',
                 'description': 'Lineage relationships should have confidence >= 0.6',
                 'severity': Severity.INFO,
                 'scope': 'snowflake',
+                'target_label': 'OlistData',
+                'read_labels': ('OlistData',),
+                'read_rel_types': ('DERIVES_FROM',),
                 'validation_query': """
                     MATCH (t1:OlistData)-[r:DERIVES_FROM]->(t2:OlistData)
-                    WHERE r.confidence < 0.6
-                    RETURN t1.schema + '.' + t1.name + ' <- ' + t2.schema + '.' + t2.name AS node_id,
+                    WHERE r.confidence < $min_confidence
+                    RETURN t1.qualified_name + ' <- ' + t2.qualified_name AS node_id,
                            'DERIVES_FROM' AS node_label,
                            'Low confidence lineage - needs verification' AS message,
                            'confidence' AS property_path,
                            toString(r.confidence) AS actual_value,
-                           '>= 0.6' AS expected_value
-                """
+                           '>= ' + toString($min_confidence) AS expected_value
+                """,
+                'params': {'min_confidence': 0.6}
             },
             {
                 'name': 'SampleDataIntegrityShape',
                 'description': 'Every Order must be linked to a Customer',
                 'severity': Severity.CRITICAL,
                 'scope': 'snowflake',
+                'target_label': 'Order',
+                'read_labels': ('Order', 'Customer'),
+                'read_rel_types': ('PLACED',),
                 'validation_query': """
                     MATCH (o:Order)
                     WHERE NOT EXISTS {
@@ -271,32 +494,31 @@ class SHACLValidator:
                 'description': 'Schema names should follow OLIST_* pattern',
                 'severity': Severity.INFO,
                 'scope': 'snowflake',
-                'validation_query': """
-                    MATCH (t:OlistData)
-                    WHERE NOT t.schema STARTS WITH 'OLIST_'
-                    RETURN t.schema + '.' + t.name AS node_id,
-                           'OlistData' AS node_label,
-                           'Schema name does not follow OLIST_* convention' AS message,
-                           'schema' AS property_path,
-                           t.schema AS actual_value,
-                           'OLIST_*' AS expected_value
-                """
+                'target_label': 'OlistData',
+                'scan_condition': "NOT t.schema STARTS WITH $schema_prefix",
+                'scan_row': """{
+                    node_id: t.qualified_name,
+                    message: 'Schema name does not follow OLIST_* convention',
+                    property_path: 'schema',
+                    actual_value: t.schema,
+                    expected_value: $schema_prefix + '*'
+                }""",
+                'params': {'schema_prefix': 'OLIST_'}
             },
             {
                 'name': 'TableNameShape',
                 'description': 'Table name must not be empty or null',
                 'severity': Severity.CRITICAL,
                 'scope': 'snowflake',
-                'validation_query': """
-                    MATCH (t:OlistData)
-                    WHERE t.name IS NULL OR trim(t.name) = ''
-                    RETURN coalesce(t.schema, 'UNKNOWN') + '.' + coalesce(t.name, 'NULL') AS node_id,
-                           'OlistData' AS node_label,
-                           'Table has empty or null name' AS message,
-                           'name' AS property_path,
-                           coalesce(t.name, 'NULL') AS actual_value,
-                           'Non-empty string' AS expected_value
-                """
+                'target_label': 'OlistData',
+                'scan_condition': "t.name IS NULL OR trim(t.name) = ''",
+                'scan_row': """{
+                    node_id: coalesce(t.schema, 'UNKNOWN') + '.' + coalesce(t.name, 'NULL'),
+                    message: 'Table has empty or null name',
+                    property_path: 'name',
+                    actual_value: coalesce(t.name, 'NULL'),
+                    expected_value: 'Non-empty string'
+                }"""
             }
         ]
     
@@ -308,6 +530,9 @@ class SHACLValidator:
                 'description': 'All federated tables must have an owner assigned',
                 'severity': Severity.CRITICAL,
                 'scope': 'federated',
+                'target_label': 'FederatedTable',
+                'read_labels': ('FederatedTable',),
+                'read_rel_types': (),
                 'validation_query': """
                     MATCH (t:FederatedTable)
                     WHERE t.owner IS NULL OR trim(t.owner) = ''
@@ -324,9 +549,12 @@ class SHACLValidator:
                 'description': 'Databricks tables must have column definitions',
                 'severity': Severity.CRITICAL,
                 'scope': 'databricks',
+                'target_label': 'FederatedTable',
+                'read_labels': ('FederatedTable', 'FederatedColumn'),
+                'read_rel_types': ('HAS_COLUMN',),
                 'validation_query': """
                     MATCH (t:FederatedTable)
-                    WHERE t.source = 'databricks'
+                    WHERE t.source = $source
                     AND NOT EXISTS {
                         MATCH (t)-[:HAS_COLUMN]->(:FederatedColumn)
                     }
@@ -336,16 +564,20 @@ class SHACLValidator:
                            'HAS_COLUMN' AS property_path,
                            '0 columns' AS actual_value,
                            '>= 1 column' AS expected_value
-                """
+                """,
+                'params': {'source': 'databricks'}
             },
             {
                 'name': 'SensitivityClassificationShape',
                 'description': 'All Databricks columns must have sensitivity classification',
                 'severity': Severity.WARNING,
                 'scope': 'databricks',
+                'target_label': 'FederatedTable',
+                'read_labels': ('FederatedTable', 'FederatedColumn'),
+                'read_rel_types': ('HAS_COLUMN',),
                 'validation_query': """
                     MATCH (t:FederatedTable)-[:HAS_COLUMN]->(c:FederatedColumn)
-                    WHERE t.source = 'databricks'
+                    WHERE t.source = $source
                     AND (c.sensitivity IS NULL OR trim(c.sensitivity) = '')
                     RETURN t.full_name + '.' + c.name AS node_id,
                            'FederatedColumn' AS node_label,
@@ -353,57 +585,65 @@ class SHACLValidator:
                            'sensitivity' AS property_path,
                            coalesce(c.sensitivity, 'NULL') AS actual_value,
                            'Low/Medium/High/Critical' AS expected_value
-                """
+                """,
+                'params': {'source': 'databricks'}
             },
             {
                 'name': 'PIIDetectionShape',
                 'description': 'Columns with PII indicators should be marked High/Critical',
                 'severity': Severity.WARNING,
                 'scope': 'databricks',
+                'target_label': 'FederatedTable',
+                'read_labels': ('FederatedTable', 'FederatedColumn'),
+                'read_rel_types': ('HAS_COLUMN',),
                 'validation_query': """
                     MATCH (t:FederatedTable)-[:HAS_COLUMN]->(c:FederatedColumn)
-                    WHERE t.source = 'databricks'
-                    AND (
-                        toLower(c.name) CONTAINS 'email' OR
-                        toLower(c.name) CONTAINS 'phone' OR
-                        toLower(c.name) CONTAINS 'ssn' OR
-                        toLower(c.name) CONTAINS 'address' OR
-                        toLower(c.name) CONTAINS 'credit_card' OR
-                        toLower(c.name) CONTAINS 'password'
-                    )
-                    AND NOT c.sensitivity IN ['High', 'Critical', 'high', 'critical']
+                    WHERE t.source = $source
+                    AND c.pii_hint
+                    AND NOT c.sensitivity IN $protected_levels
                     RETURN t.full_name + '.' + c.name AS node_id,
                            'FederatedColumn' AS node_label,
                            'Potential PII column not marked High/Critical sensitivity' AS message,
                            'sensitivity' AS property_path,
                            coalesce(c.sensitivity, 'NULL') AS actual_value,
                            'High or Critical' AS expected_value
-                """
+                """,
+                'params': {
+                    'source': 'databricks',
+                    'protected_levels': ['High', 'Critical', 'high', 'critical']
+                }
             },
             {
                 'name': 'CrossSourceConfidenceShape',
                 'description': 'Cross-source SIMILAR_TO matches below 0.25 need review',
                 'severity': Severity.INFO,
                 'scope': 'cross-source',
+                'target_label': 'FederatedTable',
+                'read_labels': ('FederatedTable', 'OlistData'),
+                'read_rel_types': ('SIMILAR_TO',),
                 'validation_query': """
                     MATCH (db:FederatedTable)-[r:SIMILAR_TO]->(sf:OlistData)
-                    WHERE r.score < 0.25
-                    RETURN db.full_name + ' <-> ' + sf.schema + '.' + sf.name AS node_id,
+                    WHERE r.score < $min_score
+                    RETURN db.full_name + ' <-> ' + sf.qualified_name AS node_id,
                            'SIMILAR_TO' AS node_label,
                            'Very low confidence cross-source match' AS message,
                            'score' AS property_path,
                            toString(r.score) AS actual_value,
-                           '>= 0.25' AS expected_value
-                """
+                           '>= ' + toString($min_score) AS expected_value
+                """,
+                'params': {'min_score': 0.25}
             },
             {
                 'name': 'FederatedRowCountShape',
                 'description': 'Databricks tables must have valid row counts',
                 'severity': Severity.CRITICAL,
                 'scope': 'databricks',
+                'target_label': 'FederatedTable',
+                'read_labels': ('FederatedTable',),
+                'read_rel_types': (),
                 'validation_query': """
                     MATCH (t:FederatedTable)
-                    WHERE t.source = 'databricks'
+                    WHERE t.source = $source
                     AND (t.row_count IS NULL OR t.row_count <= 0)
                     RETURN t.full_name AS node_id,
                            'FederatedTable' AS node_label,
@@ -411,16 +651,20 @@ class SHACLValidator:
                            'row_count' AS property_path,
                            coalesce(toString(t.row_count), 'NULL') AS actual_value,
                            '> 0' AS expected_value
-                """
+                """,
+                'params': {'source': 'databricks'}
             },
             {
                 'name': 'DatabricksSourceLinkageShape',
                 'description': 'Databricks tables must be linked to DataSource node',
                 'severity': Severity.WARNING,
                 'scope': 'databricks',
+                'target_label': 'FederatedTable',
+                'read_labels': ('FederatedTable', 'DataSource'),
+                'read_rel_types': ('FROM_SOURCE',),
                 'validation_query': """
                     MATCH (t:FederatedTable)
-                    WHERE t.source = 'databricks'
+                    WHERE t.source = $source
                     AND NOT EXISTS {
                         MATCH (t)-[:FROM_SOURCE]->(:DataSource)
                     }
@@ -430,38 +674,48 @@ class SHACLValidator:
                            'FROM_SOURCE' AS property_path,
                            'No linkage' AS actual_value,
                            'FROM_SOURCE -> DataSource' AS expected_value
-                """
+                """,
+                'params': {'source': 'databricks'}
             },
             {
                 'name': 'ColumnDataTypeShape',
                 'description': 'Column data types should be properly formatted',
                 'severity': Severity.INFO,
                 'scope': 'databricks',
+                'target_label': 'FederatedTable',
+                'read_labels': ('FederatedTable', 'FederatedColumn'),
+                'read_rel_types': ('HAS_COLUMN',),
                 'validation_query': """
                     MATCH (t:FederatedTable)-[:HAS_COLUMN]->(c:FederatedColumn)
-                    WHERE t.source = 'databricks'
+                    WHERE t.source = $source
                     AND c.data_type IS NOT NULL
-                    AND NOT (
-                        c.data_type STARTS WITH 'ColumnTypeName.' OR
-                        c.data_type IN ['STRING', 'INT', 'LONG', 'DOUBLE', 'BOOLEAN', 'DATE', 'TIMESTAMP']
-                    )
+                    AND NOT c.data_type IN $valid_types
+                    AND NOT c.data_type STARTS WITH $type_prefix
                     RETURN t.full_name + '.' + c.name AS node_id,
                            'FederatedColumn' AS node_label,
                            'Non-standard data type format' AS message,
                            'data_type' AS property_path,
                            c.data_type AS actual_value,
                            'ColumnTypeName.* or standard SQL type' AS expected_value
-                """
+                """,
+                'params': {
+                    'source': 'databricks',
+                    'valid_types': ['STRING', 'INT', 'LONG', 'DOUBLE', 'BOOLEAN', 'DATE', 'TIMESTAMP'],
+                    'type_prefix': 'ColumnTypeName.'
+                }
             },
             {
                 'name': 'FederatedLineageShape',
                 'description': 'Databricks tables should have lineage when relationships exist',
                 'severity': Severity.INFO,
                 'scope': 'databricks',
+                'target_label': 'FederatedTable',
+                'read_labels': ('FederatedTable',),
+                'read_rel_types': ('DERIVES_FROM',),
                 'validation_query': """
                     MATCH (t:FederatedTable)
-                    WHERE t.source = 'databricks'
-                    AND t.full_name CONTAINS 'feedback'
+                    WHERE t.source = $source
+                    AND t.full_name CONTAINS $name_fragment
                     AND NOT EXISTS {
                         MATCH (t)-[:DERIVES_FROM]->(:FederatedTable)
                     }
@@ -471,25 +725,34 @@ class SHACLValidator:
                            'DERIVES_FROM' AS property_path,
                            'No lineage' AS actual_value,
                            'DERIVES_FROM relationship if applicable' AS expected_value
-                """
+                """,
+                'params': {'source': 'databricks', 'name_fragment': 'feedback'}
             },
             {
                 'name': 'CrossPlatformConsistencyShape',
                 'description': 'High-confidence matches should have similar row counts',
                 'severity': Severity.WARNING,
                 'scope': 'cross-source',
+                'target_label': 'FederatedTable',
+                'read_labels': ('FederatedTable', 'OlistData'),
+                'read_rel_types': ('SIMILAR_TO',),
                 'validation_query': """
                     MATCH (db:FederatedTable)-[r:SIMILAR_TO]->(sf:OlistData)
-                    WHERE r.score >= 0.35
-                    AND db.row_count IS NOT NULL AND sf.row_count IS NOT NULL
-                    AND abs(toFloat(db.row_count) - toFloat(sf.row_count)) > (toFloat(sf.row_count) * 0.5)
-                    RETURN db.full_name + ' <-> ' + sf.schema + '.' + sf.name AS node_id,
+                    WHERE r.score >= $min_score
+                    AND (r.row_count_delta_ratio > $max_delta_ratio
+                         // No ratio without a positive Snowflake count (stored
+                         // as -1); compare the counts directly, as before
+                         OR (sf.row_count <= 0 AND db.row_count IS NOT NULL
+                             AND abs(toFloat(db.row_count) - toFloat(sf.row_count))
+                                 > toFloat(sf.row_count) * $max_delta_ratio))
+                    RETURN db.full_name + ' <-> ' + sf.qualified_name AS node_id,
                            'SIMILAR_TO' AS node_label,
                            'High-confidence match has >50% row count difference' AS message,
                            'row_count' AS property_path,
                            toString(db.row_count) + ' vs ' + toString(sf.row_count) AS actual_value,
                            'Within 50% of each other' AS expected_value
-                """
+                """,
+                'params': {'min_score': 0.35, 'max_delta_ratio': 0.5}
             }
         ]
     
@@ -503,8 +766,8 @@ class SHACLValidator:
     
     def validate_databricks(self) -> ValidationReport:
         """Run only Databricks-specific shapes"""
-        databricks_shapes = [s for s in self.federated_shapes 
-                           if s.get('scope') in ['databricks', 'cross-source']]
+        databricks_shapes = (self._shapes_by_scope['databricks']
+                             + self._shapes_by_scope['cross-source'])
         return self._run_validation(databricks_shapes, scope="databricks")
     
     def validate_federated(self) -> ValidationReport:
@@ -513,8 +776,7 @@ class SHACLValidator:
     
     def validate_cross_source(self) -> ValidationReport:
         """Run only cross-source consistency shapes"""
-        cross_shapes = [s for s in self.federated_shapes 
-                       if s.get('scope') == 'cross-source']
+        cross_shapes = self._shapes_by_scope['cross-source']
         return self._run_validation(cross_shapes, scope="cross-source")
     
     def _run_validation(self, shapes: List[Dict], scope: str) -> ValidationReport:
@@ -526,21 +788,57 @@ class SHACLValidator:
         violations = []
         nodes_checked = 0
         
-        with self.driver.session() as session:
-            # Count nodes based on scope
-            if scope in ["all", "snowflake"]:
-                result = session.run("MATCH (n:OlistData) RETURN count(n) as c")
-                nodes_checked += result.single()['c']
-            if scope in ["all", "federated", "databricks", "cross-source"]:
-                result = session.run("MATCH (n:FederatedTable) RETURN count(n) as c")
-                nodes_checked += result.single()['c']
+        # Label totals come from the count store; add the ones the scope covers
+        counts = self._graph_counts()
+        if scope in ["all", "snowflake"]:
+            nodes_checked += counts.get('OlistData', 0)
+        if scope in ["all", "federated", "databricks", "cross-source"]:
+            nodes_checked += counts.get('FederatedTable', 0)
+        
+        # A shape with no target nodes can't be violated; don't query for it
+        runnable = [s for s in shapes if counts.get(s['target_label'], 0) > 0]
+        skipped = {s['name'] for s in shapes} - {s['name'] for s in runnable}
+        
+        # A shape whose inputs haven't changed since its last successful run
+        # reuses that run's violations instead of querying again
+        last_modified = self._last_modified()
+        reuse_keys = {s['name']: self._reuse_key(s, counts, last_modified) for s in runnable}
+        shape_results = {}
+        for s in runnable:
+            cached = self._shape_cache.get(s['name'])
+            if cached is not None and cached[0] == reuse_keys[s['name']]:
+                shape_results[s['name']] = cached[1]
+        reused = set(shape_results)
+        stale = [s for s in runnable if s['name'] not in reused]
+        
+        # Shapes are independent read queries: run them concurrently so the
+        # report costs about the slowest shape instead of the sum of all.
+        # OlistData property shapes share one scan and count as one query.
+        fused = [s for s in stale if 'scan_condition' in s]
+        standalone = [s for s in stale if 'scan_condition' not in s]
+        fused_future = self._pool.submit(self._run_fused_olist_scan, fused) if fused else None
+        shape_results.update(zip(
+            (s['name'] for s in standalone),
+            self._pool.map(self._validate_shape, standalone)
+        ))
+        if fused_future is not None:
+            shape_results.update(fused_future.result())
+        
+        for shape in shapes:
+            if shape['name'] in skipped:
+                print(f"  ⏭️ {shape['name']}: skipped (no {shape['target_label']} nodes)")
+                continue
+            shape_violations = shape_results[shape['name']]
+            if shape_violations is None:
+                # Query failed (already reported); nothing to reuse next run
+                shape_violations = []
+            elif shape['name'] not in reused:
+                self._shape_cache[shape['name']] = (reuse_keys[shape['name']], shape_violations)
+            violations.extend(shape_violations)
             
-            for shape in shapes:
-                shape_violations = self._validate_shape(session, shape)
-                violations.extend(shape_violations)
-                
-                status = "✅" if len(shape_violations) == 0 else "❌"
-                print(f"  {status} {shape['name']}: {len(shape_violations)} violations")
+            status = "✅" if len(shape_violations) == 0 else "❌"
+            note = " (inputs unchanged, reused)" if shape['name'] in reused else ""
+            print(f"  {status} {shape['name']}: {len(shape_violations)} violations{note}")
         
         report = ValidationReport(
             timestamp=datetime.now(),
@@ -559,34 +857,108 @@ class SHACLValidator:
         
         return report
     
-    def _validate_shape(self, session, shape: Dict) -> List[Violation]:
-        """Execute a single shape validation query"""
-        violations = []
+    def _validate_shape(self, shape: Dict) -> Optional[List[Violation]]:
+        """Execute a single shape validation query on the worker's session
         
+        Returns None if the query failed.
+        """
         try:
-            result = session.run(shape['validation_query'])
+            # Constants travel as parameters so the plan cache is reused
+            return self._session().execute_read(shape['work'])
             
-            for record in result:
-                violation = Violation(
-                    shape_name=shape['name'],
-                    node_id=record['node_id'],
-                    node_label=record['node_label'],
-                    message=record['message'],
-                    severity=shape['severity'],
-                    property_path=record.get('property_path'),
-                    actual_value=record.get('actual_value'),
-                    expected_value=record.get('expected_value')
-                )
-                violations.append(violation)
-                
         except Exception as e:
             print(f"  ⚠️ Error in {shape['name']}: {e}")
         
+        return None
+    
+    def _run_fused_olist_scan(self, shapes: List[Dict]) -> Dict[str, Optional[List[Violation]]]:
+        """Evaluate OlistData property shapes in one pass over the label
+        
+        Each node is visited once; its lineage/column existence is computed
+        once and every shape's scan_condition is tested against it, tagging
+        violations with the shape that failed. Every shape maps to None if
+        the scan failed.
+        """
+        violations = {shape['name']: [] for shape in shapes}
+        
+        try:
+            try:
+                results = self._session().execute_read(self._fused_olist_work(shapes))
+            except ClientError as e:
+                if not self._parallel_runtime:
+                    raise
+                # Some plans aren't supported by the parallel runtime; drop it
+                # for the rest of this validator's life and rerun serially
+                print(f"  ⚠️ Parallel runtime unavailable for fused scan ({e.code}), running serially")
+                self._parallel_runtime = False
+                self._fused_work.clear()
+                results = self._session().execute_read(self._fused_olist_work(shapes))
+            
+            for violation in results:
+                violations[violation.shape_name].append(violation)
+        
+        except Exception as e:
+            print(f"  ⚠️ Error in fused OlistData scan: {e}")
+            return dict.fromkeys(violations)
+        
         return violations
     
+    def _fused_olist_work(self, shapes: List[Dict]) -> Callable:
+        """Transaction function for the fused scan, cached per shape selection"""
+        key = tuple(shape['name'] for shape in shapes)
+        work = self._fused_work.get(key)
+        if work is not None:
+            return work
+        
+        checks = ",\n".join(
+            f"{{shape: '{shape['name']}', "
+            f"row: CASE WHEN {shape['scan_condition']} THEN {shape['scan_row']} END}}"
+            for shape in shapes
+        )
+        runtime = "CYPHER runtime=parallel" if self._parallel_runtime else ""
+        query = f"""
+            {runtime}
+            MATCH (t:OlistData)
+            WITH t,
+                 EXISTS {{ MATCH (t)-[:DERIVES_FROM]->(:OlistData) }} AS has_lineage,
+                 EXISTS {{ MATCH (t)-[:HAS_COLUMN]->(:OlistColumn) }} AS has_columns
+            UNWIND [{checks}] AS chk
+            WITH chk.shape AS shape, chk.row AS v
+            WHERE v IS NOT NULL
+            RETURN shape,
+                   v.node_id AS node_id,
+                   'OlistData' AS node_label,
+                   v.message AS message,
+                   v.property_path AS property_path,
+                   v.actual_value AS actual_value,
+                   v.expected_value AS expected_value
+        """
+        params = {}
+        for shape in shapes:
+            params.update(shape.get('params', {}))
+        
+        shapes_by_name = {shape['name']: shape for shape in shapes}
+        work = self._fused_work[key] = self._shape_work(
+            'FusedOlistScan', query, params,
+            lambda record: self._make_violation(shapes_by_name[record['shape']], record)
+        )
+        return work
+    
+    def _make_violation(self, shape: Dict, record) -> Violation:
+        return Violation(
+            shape_name=shape['name'],
+            node_id=record['node_id'],
+            node_label=record['node_label'],
+            message=record['message'],
+            severity=shape['severity'],
+            property_path=record.get('property_path'),
+            actual_value=record.get('actual_value'),
+            expected_value=record.get('expected_value')
+        )
+    
     def validate_shape(self, shape_name: str) -> ValidationReport:
         """Run a single validation shape by name"""
-        shape = next((s for s in self.shapes if s['name'] == shape_name), None)
+        shape = self._shapes_by_name.get(shape_name)
         
         if not shape:
             raise ValueError(f"Unknown shape: {shape_name}")
@@ -595,9 +967,7 @@ class SHACLValidator:
     
     def get_shape_info(self, scope: str = None) -> List[Dict]:
         """Get information about defined shapes, optionally filtered by scope"""
-        shapes_to_show = self.shapes
-        if scope:
-            shapes_to_show = [s for s in self.shapes if s.get('scope') == scope]
+        shapes_to_show = self._shapes_by_scope.get(scope, []) if scope else self.shapes
         
         return [
             {
@@ -611,41 +981,51 @@ class SHACLValidator:
     
     def get_stats(self) -> Dict:
         """Get validation statistics"""
-        with self.driver.session() as session:
-            stats = {}
-            
-            # OlistData count
-            result = session.run("MATCH (n:OlistData) RETURN count(n) as c")
-            stats['olist_tables'] = result.single()['c']
-            
-            # FederatedTable counts
-            result = session.run("""
-                MATCH (n:FederatedTable)
-                RETURN n.source as source, count(n) as c
-            """)
-            for record in result:
-                stats[f'federated_{record["source"]}'] = record['c']
-            
-            # Column counts
-            result = session.run("MATCH (n:OlistColumn) RETURN count(n) as c")
-            stats['olist_columns'] = result.single()['c']
-            
-            result = session.run("MATCH (n:FederatedColumn) RETURN count(n) as c")
-            stats['federated_columns'] = result.single()['c']
-            
-            # Relationship counts
-            result = session.run("MATCH ()-[r:SIMILAR_TO]->() RETURN count(r) as c")
-            stats['cross_source_matches'] = result.single()['c']
-            
-            stats['total_shapes'] = len(self.shapes)
-            stats['snowflake_shapes'] = len(self.snowflake_shapes)
-            stats['federated_shapes'] = len(self.federated_shapes)
-            
+        counts = self._graph_counts()
+        stats = {'olist_tables': counts.get('OlistData', 0)}
+        
+        # FederatedTable counts (per source, so not in the count store)
+        record = self._session().execute_read(self._single_record, """
+            MATCH (n:FederatedTable)
+            WITH n.source AS source, count(n) AS c
+            RETURN collect([source, c]) AS federated_by_source
+        """)
+        for source, c in record['federated_by_source']:
+            stats[f'federated_{source}'] = c
+        
+        # Column counts
+        stats['olist_columns'] = counts.get('OlistColumn', 0)
+        stats['federated_columns'] = counts.get('FederatedColumn', 0)
+        
+        # Relationship counts
+        stats['cross_source_matches'] = counts.get('SIMILAR_TO', 0)
+        
+        stats['total_shapes'] = len(self.shapes)
+        stats['snowflake_shapes'] = len(self.snowflake_shapes)
+        stats['federated_shapes'] = len(self.federated_shapes)
+        
         return stats
     
+    # Card colour and icon per violation severity in the HTML report
+    SEVERITY_STYLES = {
+        'critical': ('#ef4444', '🔴'),
+        'warning': ('#f59e0b', '🟡'),
+        'info': ('#3b82f6', '🔵'),
+    }
+    
     def generate_report_html(self, report: ValidationReport) -> str:
-        """Generate HTML report for Gradio display"""
+        """Generate HTML report for Gradio display (templates/report.html.j2)"""
+        buf = io.StringIO()
+        self.write_report_html(report, buf)
+        return buf.getvalue()
+    
+    def write_report_html(self, report: ValidationReport, fp: TextIO):
+        """Stream the HTML report into a text file object
         
+        The template is written chunk by chunk into one buffer, so reports
+        with many violations never build intermediate strings; pass an open
+        file to skip holding the whole page in memory.
+        """
         scope_colors = {
             'all': '#8b5cf6',
             'snowflake': '#3b82f6',
@@ -655,92 +1035,23 @@ class SHACLValidator:
         }
         scope_color = scope_colors.get(report.scope, '#6b7280')
         
-        if report.is_valid:
-            return f"""
-<div style="background: rgba(16, 185, 129, 0.15); border-radius: 16px; padding: 24px; border: 1px solid rgba(16, 185, 129, 0.3);">
-    <div style="text-align: center;">
-        <div style="font-size: 48px; margin-bottom: 16px;">✅</div>
-        <div style="font-size: 24px; font-weight: 700; color: #6ee7b7;">All Validations Passed!</div>
-        <div style="font-size: 14px; color: #a0a0b0; margin-top: 8px;">
-            Scope: <span style="color: {scope_color}; font-weight: 600;">{report.scope.upper()}</span> | 
-            {report.total_nodes_checked} nodes checked | {report.shapes_evaluated} shapes
-        </div>
-    </div>
-</div>
-"""
-        
-        html = f"""
-<div style="background: rgba(20, 20, 30, 0.8); border-radius: 16px; padding: 24px; border: 1px solid rgba(255,255,255,0.08);">
-    <div style="display: flex; align-items: center; gap: 12px; margin-bottom: 20px;">
-        <span style="font-size: 28px;">🛡️</span>
-        <span style="font-size: 20px; font-weight: 600; color: #f0f0f5;">Governance Report</span>
-        <span style="background: {scope_color}; padding: 4px 12px; border-radius: 12px; font-size: 12px; color: white;">{report.scope.upper()}</span>
-    </div>
-    
-    <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 12px; margin-bottom: 24px;">
-        <div style="background: rgba(30, 30, 45, 0.9); border-radius: 12px; padding: 16px; text-align: center;">
-            <div style="font-size: 28px; font-weight: 700; color: #f0f0f5;">{report.total_nodes_checked}</div>
-            <div style="font-size: 12px; color: #a0a0b0;">Nodes</div>
-        </div>
-        <div style="background: rgba(239, 68, 68, 0.15); border-radius: 12px; padding: 16px; text-align: center; border: 1px solid rgba(239, 68, 68, 0.3);">
-            <div style="font-size: 28px; font-weight: 700; color: #fca5a5;">{report.critical_count}</div>
-            <div style="font-size: 12px; color: #a0a0b0;">Critical</div>
-        </div>
-        <div style="background: rgba(245, 158, 11, 0.15); border-radius: 12px; padding: 16px; text-align: center; border: 1px solid rgba(245, 158, 11, 0.3);">
-            <div style="font-size: 28px; font-weight: 700; color: #fcd34d;">{report.warning_count}</div>
-            <div style="font-size: 12px; color: #a0a0b0;">Warning</div>
-        </div>
-        <div style="background: rgba(59, 130, 246, 0.15); border-radius: 12px; padding: 16px; text-align: center; border: 1px solid rgba(59, 130, 246, 0.3);">
-            <div style="font-size: 28px; font-weight: 700; color: #93c5fd;">{report.info_count}</div>
-            <div style="font-size: 12px; color: #a0a0b0;">Info</div>
-        </div>
-    </div>
-    
-    <div style="font-size: 16px; font-weight: 600; color: #f0f0f5; margin-bottom: 16px;">Violations</div>
-    <div style="display: grid; gap: 12px;">
-"""
-        
-        sorted_violations = sorted(
-            report.violations, 
-            key=lambda v: ['critical', 'warning', 'info'].index(v.severity.value)
-        )
+        severity_rank = {'critical': 0, 'warning': 1, 'info': 2}
+        sorted_violations = sorted(report.violations, key=lambda v: severity_rank[v._sev])
         
-        for v in sorted_violations:
-            if v.severity == Severity.CRITICAL:
-                border_color = "#ef4444"
-                icon = "🔴"
-            elif v.severity == Severity.WARNING:
-                border_color = "#f59e0b"
-                icon = "🟡"
-            else:
-                border_color = "#3b82f6"
-                icon = "🔵"
-            
-            html += f"""
-        <div style="background: rgba(30, 30, 45, 0.9); border-radius: 12px; padding: 16px; border-left: 4px solid {border_color};">
-            <div style="display: flex; justify-content: space-between; align-items: start; margin-bottom: 8px;">
-                <div style="display: flex; align-items: center; gap: 8px;">
-                    <span>{icon}</span>
-                    <span style="font-weight: 600; color: #f0f0f5; font-size: 13px;">{v.node_id}</span>
-                </div>
-                <span style="background: rgba(99, 102, 241, 0.3); padding: 4px 10px; border-radius: 10px; font-size: 10px; color: #a5b4fc;">{v.shape_name}</span>
-            </div>
-            <div style="font-size: 13px; color: #a0a0b0; margin-bottom: 8px;">{v.message}</div>
-            <div style="display: flex; gap: 16px; font-size: 11px; color: #606070;">
-                <span>Expected: <span style="color: #6ee7b7;">{v.expected_value}</span></span>
-                <span>Actual: <span style="color: #fca5a5;">{v.actual_value}</span></span>
-            </div>
-        </div>
-"""
-        
-        html += """
-    </div>
-</div>
-"""
-        return html
+        self._report_template.stream(
+            report=report,
+            scope_color=scope_color,
+            violations=sorted_violations,
+            severity_styles=self.SEVERITY_STYLES
+        ).dump(fp)
     
     def close(self):
         """Close Neo4j connection"""
+        self._pool.shutdown()
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
         self.driver.close()
         print("✅ SHACL Validator connection closed")
 
@@ -9,15 +9,32 @@ from pymilvus import Collection, connections
 from sentence_transformers import SentenceTransformer
 from neo4j import GraphDatabase
 import os
+import copy
 import math
 import joblib
 import json
 import numpy as np
 from dotenv import load_dotenv
 from collections import defaultdict
+from functools import lru_cache
+
+# Project root, so the module also runs as a script
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.common.graph_version import graph_version
 
 load_dotenv()
 
+
+class _RouteFailure(Exception):
+    """Carries a response built around a failed route past the result cache"""
+    
+    def __init__(self, response):
+        super().__init__(response)
+        self.response = response
+
+
 class AdaptiveEnsembleEngine:
     """
     Intelligent adaptive system:
@@ -25,6 +42,9 @@ class AdaptiveEnsembleEngine:
     - Low confidence → Run top 2 routes and merge
     """
     
+    PREDICTION_CACHE_SIZE = 1024
+    RESULT_CACHE_SIZE = 1024
+    
     def __init__(self):
         # Database connections
         connections.connect(host='localhost', port='19530')
@@ -63,6 +83,12 @@ class AdaptiveEnsembleEngine:
         except Exception as e:
             print(f"⚠️  XGBoost not available: {e}")
             self.has_ml = False
+        
+        # Per-instance LRUs (a decorated method would share one cache across
+        # instances and keep them alive): route probabilities per question,
+        # full responses per (question, top_k, graph version)
+        self._predict_cached = lru_cache(maxsize=self.PREDICTION_CACHE_SIZE)(self._predict_route_probs)
+        self._query_cached = lru_cache(maxsize=self.RESULT_CACHE_SIZE)(self._query_uncached)
     
     def predict_adaptive_weights(self, question):
         """Get XGBoost probability distribution"""
@@ -75,43 +101,84 @@ class AdaptiveEnsembleEngine:
                 'relationship_traversal': 0.15
             }
         
+        return dict(self._predict_cached(question))
+    
+    def _predict_route_probs(self, question):
+        """Feature extraction + XGBoost forward pass, as (route, prob) pairs"""
         features_dict = self.feature_extractor.extract_features(question)
         features_array = np.array([features_dict.get(name, 0.0) for name in self.feature_names]).reshape(1, -1)
         
         route_probs = self.route_classifier.predict_proba(features_array)[0]
         
-        weights = {}
-        for i, route_name in enumerate(self.label_encoder.classes_):
-            weights[route_name] = float(route_probs[i])
-        
-        return weights
+        return tuple(
+            (route_name, float(route_probs[i]))
+            for i, route_name in enumerate(self.label_encoder.classes_)
+        )
     
     def query(self, nl_question: str, top_k: int = 5):
         """
         Adaptive query with confidence-based strategy selection
+        
+        Repeated (question, top_k) pairs are answered from the result cache
+        until the graph changes (re-ingest); callers get their own copy, so
+        mutating it doesn't poison the cache. Responses list any routes that
+        errored in failed_routes, and those responses are never cached.
         """
+        with self.neo4j.session() as session:
+            version = graph_version(session)
+        try:
+            response = self._query_cached(nl_question, top_k, version)
+        except _RouteFailure as failure:
+            return failure.response
+        return copy.deepcopy(response)
+    
+    def clear_cache(self):
+        """Drop cached predictions and results (e.g. after the graph or index changes)"""
+        self._predict_cached.cache_clear()
+        self._query_cached.cache_clear()
+    
+    def _query_uncached(self, nl_question, top_k, version=None):
+        # version is only part of the result cache key
         
         # Get weights
         weights = self.predict_adaptive_weights(nl_question)
         max_route = max(weights.items(), key=lambda x: x[1])
         
         # High confidence → Single route
+        failed = []
         if max_route[1] > 0.80:
-            return self._execute_single_route(nl_question, max_route[0], weights, top_k)
+            response = self._execute_single_route(nl_question, max_route[0], weights, top_k, failed)
         else:
-            return self._execute_multi_route(nl_question, weights, top_k)
+            response = self._execute_multi_route(nl_question, weights, top_k, failed)
+        
+        # Lets callers tell a route error apart from a genuinely empty result
+        response['failed_routes'] = failed
+        
+        # Raising keeps lru_cache from storing an answer a transient
+        # Milvus/Neo4j error emptied
+        if failed:
+            raise _RouteFailure(response)
+        return response
+    
+    def _run_route(self, question, route_name, top_k, failed):
+        """Dispatch to a route; on error record it in failed and return []"""
+        try:
+            if route_name == 'semantic_discovery':
+                return self._semantic_route(question, top_k)
+            elif route_name == 'metadata_filter':
+                return self._metadata_route(question, top_k)
+            elif route_name == 'duplicate_detection':
+                return self._duplicate_route(question, top_k)
+            else:
+                return self._relationship_route(question, top_k)
+        except Exception:
+            failed.append(route_name)
+            return []
     
-    def _execute_single_route(self, question, route_name, weights, top_k):
+    def _execute_single_route(self, question, route_name, weights, top_k, failed):
         """Execute only the predicted route"""
         
-        if route_name == 'semantic_discovery':
-            results = self._semantic_route(question, top_k)
-        elif route_name == 'metadata_filter':
-            results = self._metadata_route(question, top_k)
-        elif route_name == 'duplicate_detection':
-            results = self._duplicate_route(question, top_k)
-        else:
-            results = self._relationship_route(question, top_k)
+        results = self._run_route(question, route_name, top_k, failed)
         
         # Format
         formatted = []
@@ -130,21 +197,14 @@ class AdaptiveEnsembleEngine:
             'results': formatted
         }
     
-    def _execute_multi_route(self, question, weights, top_k):
+    def _execute_multi_route(self, question, weights, top_k, failed):
         """Execute top 2 routes and merge"""
         
         sorted_routes = sorted(weights.items(), key=lambda x: x[1], reverse=True)[:2]
         
         route_results = {}
         for route, weight in sorted_routes:
-            if route == 'semantic_discovery':
-                route_results[route] = self._semantic_route(question, 10)
-            elif route == 'metadata_filter':
-                route_results[route] = self._metadata_route(question, 10)
-            elif route == 'duplicate_detection':
-                route_results[route] = self._duplicate_route(question, 10)
-            else:
-                route_results[route] = self._relationship_route(question, 10)
+            route_results[route] = self._run_route(question, route, 10, failed)
         
         merged = self._simple_merge(route_results, weights)
         
@@ -230,7 +290,7 @@ class AdaptiveEnsembleEngine:
             
         except Exception as e:
             print(f"⚠️  Semantic route error: {e}")
-            return []
+            raise
     
     def _metadata_route(self, question, top_k):
         """Metadata filtering"""
@@ -286,7 +346,7 @@ class AdaptiveEnsembleEngine:
                     
         except Exception as e:
             print(f"⚠️  Metadata route error: {e}")
-            return []
+            raise
     
     def _duplicate_route(self, question, top_k):
         """Duplicate detection"""
@@ -303,7 +363,7 @@ class AdaptiveEnsembleEngine:
                 
         except Exception as e:
             print(f"⚠️  Duplicate route error: {e}")
-            return []
+            raise
     
     def _relationship_route(self, question, top_k):
         """Relationship traversal"""
@@ -344,7 +404,7 @@ class AdaptiveEnsembleEngine:
                 
         except Exception as e:
             print(f"⚠️  Relationship route error: {e}")
-            return []
+            raise
     
     def close(self):
         """Close connections"""
@@ -55,6 +55,8 @@ class VectorIndexer:
             FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=2000),
             FieldSchema(name="source", dtype=DataType.VARCHAR, max_length=50),  # NEW: snowflake/databricks
             FieldSchema(name="table_name", dtype=DataType.VARCHAR, max_length=200),  # NEW: for filtering
+            FieldSchema(name="qualified_name", dtype=DataType.VARCHAR, max_length=500),  # schema.name / full_name
+            FieldSchema(name="row_count", dtype=DataType.INT64),
         ]
         
         schema = CollectionSchema(fields=fields)
@@ -181,7 +183,9 @@ class VectorIndexer:
                     [embedding.tolist()],
                     [text],
                     ['snowflake'],
-                    [table['name']]
+                    [table['name']],
+                    [f"{table['schema']}.{table['name']}"],
+                    [int(table.get('row_count') or 0)]
                 ])
                 print(f"  ✓ [{i}/{len(snowflake_tables)}] {table['schema']}.{table['name']}")
             except Exception as e:
@@ -200,7 +204,9 @@ class VectorIndexer:
                     [embedding.tolist()],
                     [text],
                     ['databricks'],
-                    [table['name']]
+                    [table['name']],
+                    [table['full_name']],
+                    [int(table.get('row_count') or 0)]
                 ])
                 print(f"  ✓ [{i}/{len(databricks_tables)}] {table['full_name']}")
             except Exception as e:
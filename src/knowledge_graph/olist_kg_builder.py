@@ -8,6 +8,9 @@ Keeps Olist graph separate from TPC graph in Neo4j
 from neo4j import GraphDatabase
 from collections import defaultdict
 
+from src.common.derived_properties import REFRESH_ROW_COUNT_DELTA_RATIO
+from src.common.validation_indexes import ensure_validation_indexes
+
 
 class OlistKGBuilder:
     """Build Knowledge Graph specifically for Olist E-Commerce data"""
@@ -33,6 +36,8 @@ class OlistKGBuilder:
         
         # Create nodes
         node_count = self._create_olist_nodes(olist_metadata)
+        self._ensure_lowercase_properties()
+        ensure_validation_indexes(self.driver, ('OlistData', 'OLIST_DUPLICATE', 'DERIVES_FROM'))
         
         # Detect duplicates
         dup_count = self._detect_olist_duplicates(olist_metadata)
@@ -78,13 +83,19 @@ class OlistKGBuilder:
                             full_name: $full_name
                         })
                         SET d.name = $name,
+                            d.name_lc = toLower($name),
                             d.database = $database,
                             d.schema = $schema,
+                            d.schema_lc = toLower($schema),
+                            d.qualified_name = $schema + '.' + $name,
+                            d.qualified_name_lc = toLower($schema + '.' + $name),
                             d.row_count = $row_count,
                             d.fingerprint = $fingerprint,
                             d.column_count = $column_count,
-                            d.data_source = 'Olist E-Commerce'
-                        """
+                            d.data_source = 'Olist E-Commerce',
+                            d.updated_at = datetime()
+                        WITH d AS t
+                        """ + REFRESH_ROW_COUNT_DELTA_RATIO
                         
                         session.run(query,
                             full_name=table_data['full_name'],
@@ -101,6 +112,23 @@ class OlistKGBuilder:
         
         return count
     
+    def _ensure_lowercase_properties(self):
+        """Backfill name_lc/schema_lc on OlistData nodes and index name_lc
+        
+        Covers nodes built before these properties existed; keyword search
+        compares lower-case keywords against them instead of calling
+        toLower() on every row.
+        """
+        with self.driver.session() as session:
+            session.run("""
+                MATCH (t:OlistData)
+                WHERE t.name_lc IS NULL OR t.schema_lc IS NULL
+                SET t.name_lc = toLower(t.name), t.schema_lc = toLower(t.schema)
+            """).consume()
+            session.run(
+                "CREATE TEXT INDEX olistNameLc IF NOT EXISTS FOR (t:OlistData) ON (t.name_lc)"
+            ).consume()
+    
     def _detect_olist_duplicates(self, olist_metadata):
         """Detect duplicates within Olist data"""
         
@@ -140,6 +168,7 @@ class OlistKGBuilder:
                                 confidence: 1.0,
                                 basis: 'identical_fingerprint'
                             }]->(t2)
+                            SET t1.updated_at = datetime(), t2.updated_at = datetime()
                             """
                             session.run(query, 
                                       table1=tables[i]['full_name'],
@@ -173,6 +202,7 @@ class OlistKGBuilder:
                             overlap_pct: $overlap,
                             basis: 'column_overlap'
                         }]->(t2)
+                        SET t1.updated_at = datetime(), t2.updated_at = datetime()
                         """
                         session.run(query, 
                                   table1=table1['full_name'],
@@ -25,7 +25,9 @@ with driver.session() as session:
             r.join_column = 'transaction_id',
             r.source = 'databricks',
             r.discovered_at = datetime(),
-            r.description = 'Feedback linked to transactions via transaction_id'
+            r.description = 'Feedback linked to transactions via transaction_id',
+            feedback.updated_at = datetime(),
+            sales.updated_at = datetime()
         RETURN feedback.table_name AS from_table, 
                sales.table_name AS to_table,
                r.lineage_type AS type
@@ -139,6 +139,8 @@ class LineageGraphBuilder:
                     r.description = 'Feedback linked to transactions via transaction_id'
                 ON MATCH SET
                     r.updated_at = datetime()
+                SET feedback.updated_at = datetime(),
+                    sales.updated_at = datetime()
                 RETURN feedback.table_name AS from_table, 
                        sales.table_name AS to_table,
                        r.lineage_type AS type,
@@ -206,6 +208,8 @@ class LineageGraphBuilder:
                 r.lineage_type = $lineage_type,
                 r.confidence = CASE WHEN $confidence > r.confidence THEN $confidence ELSE r.confidence END,
                 r.updated_at = datetime()
+            SET target.updated_at = datetime(),
+                source.updated_at = datetime()
             RETURN r, 
                    CASE WHEN r.created_at = r.updated_at THEN 'created' ELSE 'updated' END as action
             """